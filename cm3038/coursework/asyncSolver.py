@@ -0,0 +1,48 @@
+"""
+Asyncio helpers for the Water Jug Problem Solver.
+A search problem can be solved on the event loop itself with ``SearchProblem.solveAsync()``,
+which hands control back every ``stepSize`` expansions.
+The helpers here instead run the blocking solvers in an executor, i.e. a pool of threads or processes,
+so that the event loop only awaits the result.
+"""
+
+import asyncio
+import functools
+
+import cm3038.coursework.waterJugProblem as jug
+import cm3038.coursework.transitionTable as transition
+
+
+def search_path(problem_class, start: jug.WaterJugState, goal: jug.WaterJugState, node_limit=None, time_limit=None):
+    """
+    Search a new problem of a given class within the given limits and return its ``Path``, or ``None``.
+    Only the ``Path`` is returned, as it is cheap to send back from a worker process.
+    """
+    problem = problem_class(start, goal)
+    problem.nodeLimit = node_limit
+    problem.timeLimit = time_limit
+    return problem.search()
+
+
+async def solve_in_executor(start: jug.WaterJugState, goal: jug.WaterJugState, executor=None):
+    """
+    Return the optimal ``Path`` from a given start to a given goal using the ``GoalTable`` of the goal,
+    computed in a given executor, or the default thread pool of the event loop.
+    With a thread pool, the tables are shared by all queries, and only the first query of a goal builds its table.
+    Like ``solve_from()``, it raises ``PlanTooLongException`` for a plan of the closed-form planner too long for a path.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, transition.solve_from, start, goal)
+
+
+async def search_in_executor(problem_class, start: jug.WaterJugState, goal: jug.WaterJugState, executor=None,
+                             node_limit=None, time_limit=None):
+    """
+    Return the ``Path`` found by a new problem of a given class, searched in a given executor,
+    or the default thread pool of the event loop.
+    Cancelling the task stops waiting for the result, but not the search already running in the executor,
+    so give a ``node_limit`` or ``time_limit`` to bound it.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(search_path, problem_class, start, goal,
+                                                                  node_limit, time_limit))
@@ -0,0 +1,281 @@
+"""
+Batch Water Jug Problem Solver.
+Reads one problem per line of JSON from a file or standard input, and writes one result per line of JSON:
+
+    {"id": 1, "a_max": 5, "b_max": 3, "start": [0, 0], "goal": [4, 0], "algorithm": "AStar"}
+
+``id`` is optional and echoed back, and ``algorithm`` defaults to ``--algorithm``.
+Capacities and volumes must be JSON integers, and are never converted from floats, strings or booleans.
+A ``Table`` plan too long to list is written as its cost, ``length`` and compressed ``plan`` instead of ``actions``.
+Optional ``node_limit`` and ``time_limit`` bound the search of that problem, and default to ``--node-limit``
+and ``--time-limit``, so a search gives up after ``DEFAULT_TIME_LIMIT`` seconds unless told otherwise.
+With ``--cache``, solutions are kept in an SQLite file shared by the workers, and reused by later runs.
+With ``--tables``, informed searches look h(n) up in a table per goal, built once per worker.
+Lines are sent to a pool of worker processes in chunks, with a bounded no. of chunks in flight,
+so the input is never held in memory as a whole. Results are written in input order, or as they complete.
+
+    python -m cm3038.coursework.batch problems.jsonl --workers 8 --order completion > results.jsonl
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+import time
+
+import cm3038.coursework.waterJugProblem as jug
+import cm3038.coursework.transitionTable as transition
+import cm3038.coursework.pathCache as pathCache
+import cm3038.coursework.heuristicTable as heuristicTable
+
+ALGORITHMS = {
+    'BFS': jug.WaterJugSearchProblemBFS,
+    'DFS': jug.WaterJugSearchProblemDFS,
+    'IDDFS': jug.WaterJugSearchProblemIDDFS,
+    'Bidirectional': jug.WaterJugSearchProblemBidirectional,
+    'BidirectionalUCS': jug.WaterJugSearchProblemBidirectionalUCS,
+    'GBF': jug.WaterJugSearchProblemGBF,
+    'AStar': jug.WaterJugSearchProblemAStar,
+    'IDAStar': jug.WaterJugSearchProblemIDAStar,
+}
+
+# Solved with the shared ``GoalTable`` of each goal, or the closed-form planner for huge capacities
+TABLE = 'Table'
+
+DEFAULT_ALGORITHM = 'AStar'
+
+# (node limit, time limit) of a problem which gives neither, so no line can tie a worker up indefinitely
+DEFAULT_NODE_LIMIT = None
+DEFAULT_TIME_LIMIT = 60.0
+DEFAULT_LIMITS = (DEFAULT_NODE_LIMIT, DEFAULT_TIME_LIMIT)
+
+
+class BatchInputException(Exception):
+    """Raised when a line of input does not describe a valid problem."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+def is_int(value):
+    """Return whether a given JSON value is an integer, as ``bool`` is an ``int`` in Python but not in JSON."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_volumes(data: dict, name: str):
+    """Return the (a, b) volumes of the member of a given name, which must be a list of exactly 2 integers."""
+    volumes = data.get(name)
+    if not isinstance(volumes, list) or len(volumes) != 2 or not all(is_int(volume) for volume in volumes):
+        raise BatchInputException("Invalid problem: {} must be a list of 2 integers.".format(name))
+    return tuple(volumes)
+
+
+def parse_problem(text: str, default_algorithm: str, default_limits=(None, None)):
+    """
+    Return the id, algorithm, start and goal ``WaterJugState`` and limits of the problem on a given line.
+    A limit the line does not give is taken from the given (node limit, time limit).
+    Values are not converted, so a capacity must be an integer, not a float, a string or a boolean.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError as error:
+        raise BatchInputException("Invalid problem: {}".format(error))
+    if not isinstance(data, dict):
+        raise BatchInputException("Invalid problem: expected a JSON object")
+    for name in ('a_max', 'b_max'):
+        if not is_int(data.get(name)):
+            raise BatchInputException("Invalid problem: {} must be an integer.".format(name))
+    a_max = data['a_max']
+    b_max = data['b_max']
+    start = parse_volumes(data, 'start')
+    goal = parse_volumes(data, 'goal')
+    algorithm = data.get('algorithm', default_algorithm)
+    if not isinstance(algorithm, str) or (algorithm != TABLE and algorithm not in ALGORITHMS):
+        raise BatchInputException("Unknown algorithm: {}".format(algorithm))
+    if min(a_max, b_max, *start, *goal) < 0:
+        raise BatchInputException("Capacities and volumes must not be negative.")
+    if start[0] > a_max or goal[0] > a_max or start[1] > b_max or goal[1] > b_max:
+        raise BatchInputException("Volumes must not be greater than capacities.")
+    node_limit = data.get('node_limit')
+    time_limit = data.get('time_limit')
+    if node_limit is not None and not is_int(node_limit):
+        raise BatchInputException("Invalid limit: node_limit must be an integer.")
+    if time_limit is not None and not (is_int(time_limit) or isinstance(time_limit, float)):
+        raise BatchInputException("Invalid limit: time_limit must be a number.")
+    if (node_limit is not None and node_limit < 0) or (time_limit is not None and not time_limit >= 0):
+        raise BatchInputException("Limits must not be negative or NaN.")
+    world = jug.WaterJugWorld(a_max, b_max)
+    limits = (default_limits[0] if node_limit is None else node_limit,
+              default_limits[1] if time_limit is None else time_limit)
+    return data.get('id'), algorithm, jug.WaterJugState(world, *start), jug.WaterJugState(world, *goal), limits
+
+
+def solve_line(line_number: int, text: str, default_algorithm: str, default_limits=DEFAULT_LIMITS):
+    """
+    Solve the problem on a given line and return its result as a dict.
+    Any error is returned as a result with an ``error`` status, so one line can't stop the others.
+    """
+    result = {'line': line_number}
+    try:
+        problem_id, algorithm, start, goal, limits = parse_problem(text, default_algorithm, default_limits)
+        if problem_id is not None:
+            result['id'] = problem_id
+        result.update(solve_problem(algorithm, start, goal, limits))
+    except Exception as error:
+        result['status'] = 'error'
+        result['error'] = str(error) if isinstance(error, BatchInputException) else repr(error)
+    return result
+
+
+def solve_problem(algorithm: str, start: jug.WaterJugState, goal: jug.WaterJugState, limits):
+    """Solve a problem with a given algorithm and (node limit, time limit), and return its result as a dict."""
+    begin = time.perf_counter()
+    if algorithm == TABLE:
+        reason = jug.unsolvable_reason(start, goal)
+        try:
+            path = None if reason is not None else transition.solve_from(start, goal)
+        except transition.PlanTooLongException as error:
+            # Only the compressed plan is written, as its actions would not fit in memory
+            result = describe(algorithm, 'solved', None, 0, time.perf_counter() - begin)
+            result['cost'] = error.plan.cost  # Exact, as it may be too large for a float
+            result['length'] = len(error.plan)
+            result['plan'] = str(error.plan).splitlines()
+            return result
+        return describe(algorithm, 'solved' if path is not None else 'exhausted', path, 0,
+                        time.perf_counter() - begin, reason)
+    problem = new_problem(algorithm, start, goal, limits)
+    search_result = problem.solve()
+    return describe(algorithm, search_result.status, search_result.path, search_result.nodeVisited,
+                    time.perf_counter() - begin, problem.rejection)
+
+
+def new_problem(algorithm: str, start: jug.WaterJugState, goal: jug.WaterJugState, limits):
+    """Return a new search problem of a given algorithm with given (node limit, time limit)."""
+    problem = ALGORITHMS[algorithm](start, goal)
+    problem.nodeLimit, problem.timeLimit = limits
+    return problem
+
+
+def describe(algorithm: str, status: str, path, nodes_visited: int, seconds: float, reason=None):
+    """Return the result of a solved problem as a dict which can be written as JSON."""
+    result = {'algorithm': algorithm, 'status': status, 'seconds': seconds, 'nodes_visited': nodes_visited}
+    if reason is not None:
+        result['reason'] = reason
+    if path is not None:
+        result['cost'] = path.cost
+        result['actions'] = [str(pair.action) for pair in path.list]
+    return result
+
+
+def solve_chunk(chunk, default_algorithm: str, default_limits=DEFAULT_LIMITS):
+    """Solve every (line number, text) pair of a given chunk and return the list of their results."""
+    return [solve_line(line_number, text, default_algorithm, default_limits) for line_number, text in chunk]
+
+
+def read_chunks(lines, chunk_size: int):
+    """Yield lists of up to ``chunk_size`` (line number, text) pairs of the non-blank lines read one at a time."""
+    numbered = ((number, text) for number, text in enumerate(lines, 1) if text.strip())
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def use_cache(cache):
+    """Make every search problem of this process consult a given ``PathCache``, or none if ``None``."""
+    jug.PathCacheCheck.path_cache = cache
+
+
+def use_tables(tables):
+    """Make every informed search problem of this process use given ``HeuristicTables``, or none if ``None``."""
+    jug.TableHeuristic.heuristic_tables = tables
+
+
+def set_up_worker(cache, tables: bool):
+    """Make every search problem of this process consult a given ``PathCache``, and heuristic tables if ``tables``."""
+    use_cache(cache)
+    use_tables(heuristicTable.HeuristicTables() if tables else None)
+
+
+def solve_stream(lines, workers=None, chunk_size=64, ordered=True, default_algorithm=DEFAULT_ALGORITHM, cache=None,
+                 tables=False, default_limits=DEFAULT_LIMITS):
+    """
+    Yield the result dict of every problem read from a given iterable of lines.
+    Chunks of lines are solved by a pool of ``workers`` processes, with at most 2 chunks per worker in flight.
+    With ``ordered``, results are yielded in input order, otherwise as soon as their chunk completes.
+    With 1 worker, problems are solved in this process instead.
+    With a ``PathCache``, every search consults it first.
+    With ``tables``, informed searches look h(n) up in ``HeuristicTables``.
+    A problem which gives no limits is bounded by ``default_limits``, a (node limit, time limit) pair.
+    """
+    chunks = read_chunks(lines, chunk_size)
+    if workers == 1:
+        set_up_worker(cache, tables)
+        for chunk in chunks:
+            yield from solve_chunk(chunk, default_algorithm, default_limits)
+        return
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=set_up_worker,
+                                                initargs=(cache, tables)) as executor:
+        pending = collections.deque()  # Futures in input order
+        for chunk in chunks:
+            pending.append(executor.submit(solve_chunk, chunk, default_algorithm, default_limits))
+            while len(pending) >= 2 * workers:  # Wait for a chunk before reading any more input
+                if ordered:
+                    yield from pending.popleft().result()
+                else:
+                    yield from completed(pending)
+        while pending:
+            if ordered:
+                yield from pending.popleft().result()
+            else:
+                yield from completed(pending)
+
+
+def completed(pending: collections.deque):
+    """Wait for at least one of the pending futures, remove those done and yield their results."""
+    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+        yield from future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Water Jug Problems read as JSON lines.")
+    parser.add_argument('input', nargs='?', default='-', help="JSONL file of problems, standard input by default")
+    parser.add_argument('--output', help="JSONL file to write results to, standard output by default")
+    parser.add_argument('--workers', type=int, default=None, help="no. of worker processes, all cores by default")
+    parser.add_argument('--chunk-size', type=int, default=64, help="no. of problems sent to a worker at once")
+    parser.add_argument('--order', choices=('input', 'completion'), default='input',
+                        help="write results in input order or as they complete")
+    parser.add_argument('--algorithm', choices=sorted(ALGORITHMS) + [TABLE], default=DEFAULT_ALGORITHM,
+                        help="algorithm of problems which do not give one")
+    parser.add_argument('--cache', help="SQLite file of solutions to reuse and add to")
+    parser.add_argument('--cache-size', type=int, default=pathCache.MAX_ENTRIES, help="max. no. of solutions kept")
+    parser.add_argument('--tables', action='store_true', help="use exact heuristic tables per goal where they fit")
+    parser.add_argument('--node-limit', type=int, default=DEFAULT_NODE_LIMIT,
+                        help="max. no. of nodes expanded by problems which do not give one, no limit by default")
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT,
+                        help="max. seconds of a search of problems which do not give one, %(default)s by default")
+    args = parser.parse_args(argv)
+    cache = None if args.cache is None else pathCache.PathCache(args.cache, args.cache_size)
+    source = sys.stdin if args.input == '-' else open(args.input)
+    target = sys.stdout if args.output is None else open(args.output, 'w')
+    try:
+        for result in solve_stream(source, args.workers, args.chunk_size, args.order == 'input', args.algorithm,
+                                   cache, args.tables, (args.node_limit, args.time_limit)):
+            target.write(json.dumps(result) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Water Jug Problem Solver daemon.
+A long-running process which answers problems sent over a Unix domain socket or localhost TCP,
+one line of JSON per problem in the format of ``batch``, with one line of JSON back per problem.
+Transition tables, goal tables and solutions stay in memory between queries, so repeated queries are cheap.
+With ``--cache``, searches also consult an SQLite file of solutions, which outlives the daemon.
+With ``--tables``, informed searches look h(n) up in a table per goal, kept for the recently used goals.
+A client may send many lines without waiting, and the results come back in the same order.
+A problem which gives no ``node_limit`` or ``time_limit`` is bounded by ``--node-limit`` and ``--time-limit``,
+so no query can keep a share of the event loop indefinitely.
+
+    python -m cm3038.coursework.daemon --socket /tmp/jugs.sock
+    python -m cm3038.coursework.daemon --port 8765
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import socket
+import sys
+import time
+
+import cm3038.coursework.batch as batch
+import cm3038.coursework.pathCache as pathCache
+import cm3038.coursework.heuristicTable as heuristicTable
+
+# Max. no. of solutions kept, the least recently used is dropped first
+CACHE_SIZE = 100000
+
+# Max. no. of problems of one connection being solved at once, reading waits beyond this
+MAX_PIPELINE = 64
+
+
+class SolutionCache:
+    """Models a least-recently-used map from a problem to its encoded result."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.results = collections.OrderedDict()
+
+    def get(self, key):
+        """Return the result of a given key, or ``None`` if it is not cached."""
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)
+        return result
+
+    def put(self, key, result: str):
+        """Cache the result of a given key, dropping the least recently used result if the cache is full."""
+        self.results[key] = result
+        self.results.move_to_end(key)
+        if len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+
+async def solve_problem(algorithm: str, start, goal, limits):
+    """
+    Solve a problem and return its result as a dict, without blocking the event loop.
+    The table and any ``PathCache`` are read in a thread, and searches hand control back every ``stepSize`` expansions.
+    """
+    if algorithm == batch.TABLE:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, batch.solve_problem, algorithm, start, goal, limits)
+    begin = time.perf_counter()
+    problem = batch.new_problem(algorithm, start, goal, limits)
+    search_result = await problem.solveAsync()
+    return batch.describe(algorithm, search_result.status, search_result.path, search_result.nodeVisited,
+                          time.perf_counter() - begin, problem.rejection)
+
+
+async def answer(text: str, cache: SolutionCache, default_limits=batch.DEFAULT_LIMITS):
+    """
+    Return the result of the problem on a given line as a line of JSON, from the cache if it was solved before.
+    The cache keeps results already encoded, so a repeated query only adds its id.
+    Any error is answered with an ``error`` status, so the connection keeps answering later lines.
+    """
+    try:
+        return await answer_problem(text, cache, default_limits)
+    except Exception as error:
+        message = str(error) if isinstance(error, batch.BatchInputException) else repr(error)
+        return json.dumps({'status': 'error', 'error': message}) + "\n"
+
+
+async def answer_problem(text: str, cache: SolutionCache, default_limits=batch.DEFAULT_LIMITS):
+    """As ``answer()``, but raise a ``BatchInputException`` for an invalid line, or any error of the solver."""
+    problem_id, algorithm, start, goal, limits = batch.parse_problem(text, batch.DEFAULT_ALGORITHM, default_limits)
+    key = (start.world.a_max, start.world.b_max, start.a, start.b, goal.a, goal.b, algorithm, limits)
+    fields = cache.get(key)  # The members of the JSON object of the result, without the braces
+    cached = fields is not None
+    if not cached:
+        result = await solve_problem(algorithm, start, goal, limits)
+        fields = json.dumps(result)[1:-1]
+        if result['status'] != 'budget-exceeded':  # A time limit may not be hit next time
+            cache.put(key, fields)
+    prefix = '"cached": {}, '.format('true' if cached else 'false')
+    if problem_id is not None:
+        prefix += '"id": {}, '.format(json.dumps(problem_id))
+    return "{" + prefix + fields + "}\n"
+
+
+async def serve_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, cache: SolutionCache,
+                           default_limits=batch.DEFAULT_LIMITS):
+    """
+    Answer every line read from a connection, solving up to ``MAX_PIPELINE`` lines at once,
+    and write the results back in the order the lines were read.
+    A problem which gives no limits is bounded by ``default_limits``, a (node limit, time limit) pair.
+    """
+    pending = asyncio.Queue(maxsize=MAX_PIPELINE)  # Tasks in the order of their lines, then None
+
+    async def respond():
+        while True:
+            task = await pending.get()
+            if task is None:
+                return
+            writer.write((await task).encode())
+            await writer.drain()
+
+    responder = asyncio.create_task(respond())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                await pending.put(asyncio.create_task(answer(line.decode(errors='replace'), cache, default_limits)))
+        await pending.put(None)
+        await responder
+    except ConnectionError:
+        pass  # The client has gone, so there is no one to answer
+    finally:
+        responder.cancel()
+        while not pending.empty():
+            task = pending.get_nowait()
+            if task is not None:
+                task.cancel()
+        writer.close()
+
+
+async def serve(path=None, host='127.0.0.1', port=None, cache=None, default_limits=batch.DEFAULT_LIMITS):
+    """Serve on a Unix domain socket at a given path, or on TCP at a given host and port, until cancelled."""
+    cache = cache or SolutionCache()
+
+    async def on_connect(reader, writer):
+        await serve_connection(reader, writer, cache, default_limits)
+
+    if path is not None:
+        server = await asyncio.start_unix_server(on_connect, path)
+    else:
+        server = await asyncio.start_server(on_connect, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+class SolverClient:
+    """
+    Models a connection to a solver daemon at a Unix domain socket path, or a (host, port) pair.
+    The connection is kept open, so each query only costs a round-trip.
+    """
+
+    def __init__(self, address):
+        if isinstance(address, str):
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.connect(address)
+        self.file = self.socket.makefile('rwb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        """Close the connection."""
+        self.file.close()
+        self.socket.close()
+
+    def solve(self, problem: dict):
+        """Send a problem dict, in the format of ``batch``, and return its result dict."""
+        return self.solve_many([problem])[0]
+
+    def solve_many(self, problems):
+        """
+        Send a list of problem dicts and return the list of their result dicts in the same order.
+        At most ``MAX_PIPELINE`` problems are sent ahead of their results, so large results can't fill both
+        directions of the socket at once and leave the client and the daemon waiting on each other.
+        """
+        result = []
+        for sent, problem in enumerate(problems):
+            if sent - len(result) >= MAX_PIPELINE:
+                self.file.flush()
+                result.append(json.loads(self.file.readline()))
+            self.file.write((json.dumps(problem) + "\n").encode())
+        self.file.flush()
+        while len(result) < len(problems):
+            result.append(json.loads(self.file.readline()))
+        return result
+
+
+def solve(problem: dict, address):
+    """Send one problem dict to a solver daemon at a given address and return its result dict."""
+    with SolverClient(address) as client:
+        return client.solve(problem)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Water Jug Problems over a socket.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--socket', help="path of the Unix domain socket to listen on")
+    group.add_argument('--port', type=int, help="localhost TCP port to listen on")
+    parser.add_argument('--host', default='127.0.0.1', help="TCP host to listen on")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="max. no. of solutions kept in memory")
+    parser.add_argument('--cache', help="SQLite file of solutions to reuse and add to")
+    parser.add_argument('--tables', action='store_true', help="use exact heuristic tables per goal where they fit")
+    parser.add_argument('--node-limit', type=int, default=batch.DEFAULT_NODE_LIMIT,
+                        help="max. no. of nodes expanded by problems which do not give one, no limit by default")
+    parser.add_argument('--time-limit', type=float, default=batch.DEFAULT_TIME_LIMIT,
+                        help="max. seconds of a search of problems which do not give one, %(default)s by default")
+    args = parser.parse_args(argv)
+    if args.cache is not None:
+        batch.use_cache(pathCache.PathCache(args.cache))
+    if args.tables:
+        batch.use_tables(heuristicTable.HeuristicTables())
+    try:
+        asyncio.run(serve(args.socket, args.host, args.port, SolutionCache(args.cache_size),
+                          (args.node_limit, args.time_limit)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Closed-form planner for the Water Jug Problem.
+Instead of searching, a plan is derived from the extended Euclidean algorithm for the pour cycle:
+repeatedly fill one jug, pour it into the other, and empty the other whenever it is full.
+The point where the cycle first reaches the goal, and the cost of getting there, are found in O(log capacity) time,
+so a plan for capacities in the 10^9 range takes milliseconds. Only expanding it into a ``Path`` is linear in its length.
+"""
+
+import cm3038.search as search
+import cm3038.coursework.waterJugProblem as jug
+
+# The stages of the cycle at an event, in the order they happen
+POURED, FILLED, EMPTIED = 1, 2, 3
+
+
+def extended_gcd(a: int, b: int):
+    """Return (g, x, y) such that a * x + b * y = g = gcd(a, b)."""
+    x0, y0, x1, y1 = 1, 0, 0, 1
+    while b:
+        q, a, b = a // b, b, a % b
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return a, x0, y0
+
+
+def smallest_solution(r1: int, m1: int, r2: int, m2: int, lower: int):
+    """
+    Return the smallest x >= ``lower`` with x = r1 (mod m1) and x = r2 (mod m2),
+    or ``None`` if the two congruences have no common solution.
+    """
+    g, p, _ = extended_gcd(m1, m2)
+    if (r2 - r1) % g != 0:
+        return None
+    period = m1 // g * m2
+    # m1 * p = g (mod m2), so r1 + m1 * p * (r2 - r1) / g solves both congruences
+    x = (r1 + m1 * p * ((r2 - r1) // g)) % period
+    if x < lower:
+        x += -(-(lower - x) // period) * period
+    return x
+
+
+def count_solutions(r1: int, m1: int, r2: int, m2: int, lower: int, upper: int):
+    """Return how many x in [``lower``, ``upper``] satisfy x = r1 (mod m1) and x = r2 (mod m2)."""
+    x = smallest_solution(r1, m1, r2, m2, lower)
+    if x is None or x > upper:
+        return 0
+    period = m1 // extended_gcd(m1, m2)[0] * m2
+    return (upper - x) // period + 1
+
+
+class PourCycle:
+    """
+    Models the pour cycle from a given state, in terms of the volumes of the source and target jugs:
+    if the source is empty, fill it; otherwise if the target is full, empty it; otherwise pour the source into the target.
+    Progress is measured by the inflow I, the litres poured so far. Pours stop at the events where
+    the source becomes empty (I = source + k * source_max) or the target becomes full (I = m * target_max - target).
+    A point of the cycle is an (inflow, stage) pair. Both capacities must be > 0.
+    """
+
+    def __init__(self, source_max: int, target_max: int, source: int, target: int):
+        self.source_max = source_max
+        self.target_max = target_max
+        self.source = source
+        self.target = target
+
+    def is_source_empty(self, inflow: int):
+        """Return ``True`` if the source becomes empty at a given inflow."""
+        return inflow >= self.source and (inflow - self.source) % self.source_max == 0
+
+    def is_target_full(self, inflow: int):
+        """Return ``True`` if the target becomes full at a given inflow."""
+        return inflow + self.target >= self.target_max and (inflow + self.target) % self.target_max == 0
+
+    def volumes(self, inflow: int, stage: int):
+        """Return the volumes (source, target) at a given point, or ``None`` if the cycle never stops there."""
+        # Variables
+        source_empty = self.is_source_empty(inflow)
+        target_full = self.is_target_full(inflow)
+        if inflow > 0 and not source_empty and not target_full:
+            return None
+        # Logic
+        if inflow <= self.source:
+            source = self.source - inflow
+        else:
+            source = (self.source - inflow) % self.source_max
+        target = self.target + inflow - self.target_max * self.empties_before(inflow)
+        if stage == POURED:
+            return source, target
+        if stage == FILLED:
+            return (self.source_max, target) if source_empty else None
+        return (self.source_max if source_empty else source, 0) if target_full else None
+
+    def fills_before(self, inflow: int):
+        """Return the number of fills before the pour cycle stops at a given inflow."""
+        if inflow <= self.source:
+            return 0
+        return (inflow - self.source - 1) // self.source_max + 1
+
+    def empties_before(self, inflow: int):
+        """Return the number of empties before the pour cycle stops at a given inflow."""
+        return max(0, (inflow + self.target - 1) // self.target_max)
+
+    def fills(self, inflow: int, stage: int):
+        """Return the number of fills up to a given point."""
+        return self.fills_before(inflow) + (stage >= FILLED and self.is_source_empty(inflow))
+
+    def empties(self, inflow: int, stage: int):
+        """Return the number of empties up to a given point."""
+        return self.empties_before(inflow) + (stage == EMPTIED)
+
+    def pours(self, inflow: int):
+        """Return the number of pours up to a given inflow, i.e. the number of events in (0, inflow]."""
+        # Variables
+        source_max = self.source_max
+        target_max = self.target_max
+        # Logic
+        if self.source > 0:
+            source_empty = (inflow - self.source) // source_max + 1 if inflow >= self.source else 0
+        else:
+            source_empty = inflow // source_max
+        target_full = max(0, (inflow + self.target) // target_max - self.target // target_max)
+        both = count_solutions(self.source % source_max, source_max, -self.target % target_max, target_max,
+                               max(self.source, target_max - self.target, 1), inflow)
+        return source_empty + target_full - both
+
+    def cost(self, inflow: int, stage: int):
+        """Return the cost of the actions up to a given point, using the per-litre costs of ``ActionType``."""
+        return self.fills(inflow, stage) * self.source_max * jug.ActionType.FILL.value \
+            + self.empties(inflow, stage) * self.target_max * jug.ActionType.EMPTY.value \
+            + inflow * jug.ActionType.POUR.value
+
+    def steps(self, inflow: int, stage: int):
+        """Return the number of actions up to a given point."""
+        return self.fills(inflow, stage) + self.empties(inflow, stage) + self.pours(inflow)
+
+    def source_empty_at(self, target: int):
+        """Return the smallest inflow > 0 where the source becomes empty with a given target volume in (0, target_max]."""
+        return smallest_solution(self.source % self.source_max, self.source_max,
+                                 (target - self.target) % self.target_max, self.target_max,
+                                 max(self.source, 1 - self.target, 1))
+
+    def target_full_at(self, source: int):
+        """Return the smallest inflow where the target becomes full with a given source volume in [0, source_max)."""
+        result = None
+        # Before the first fill, the source volume only goes down
+        inflow = self.source - source
+        if 0 <= inflow and self.is_target_full(inflow):
+            result = inflow
+        # After it, the source volume repeats with period source_max
+        if result is None:
+            result = smallest_solution((self.source - source) % self.source_max, self.source_max,
+                                       -self.target % self.target_max, self.target_max,
+                                       max(self.source + 1, self.target_max - self.target))
+        return result
+
+    def find(self, source: int, target: int):
+        """
+        Return the first point (inflow, stage) where the cycle reaches given volumes, or ``None`` if it never does.
+        The starting volumes themselves are not counted.
+        """
+        candidates = []
+        if source in (0, self.source_max) and 0 < target:
+            candidates.append((self.source_empty_at(target), POURED if source == 0 else FILLED))
+        if source == self.source_max and target == 0 and self.source == 0 and self.target == 0:
+            candidates.append((0, FILLED))
+        if target == self.target_max and source < self.source_max:
+            candidates.append((self.target_full_at(source), POURED))
+        if target == 0 and 0 < source:
+            candidates.append((self.target_full_at(source % self.source_max), EMPTIED))
+        candidates = [point for point in candidates
+                      if point[0] is not None and self.volumes(*point) == (source, target)]
+        return min(candidates, default=None)
+
+
+class Plan:
+    """
+    Models a plan in compressed form: a few ``prefix`` actions, each an (index into ``ACTIONS``, litres) pair,
+    followed by the pour cycle from ``source`` into the other jug up to a given point.
+    ``fills``, ``empties``, ``pours`` and ``poured`` count the actions and litres of the cycle.
+    """
+
+    def __init__(self, start: jug.WaterJugState, goal: jug.WaterJugState, prefix: list, prefix_cost: int,
+                 source=None, cycle=None, point=None):
+        self.start = start
+        self.goal = goal
+        self.prefix = prefix
+        self.source = source
+        self.cycle = cycle
+        self.point = point
+        self.cost = prefix_cost
+        self.fills = self.empties = self.pours = self.poured = 0
+        if cycle is not None:
+            inflow, stage = point
+            self.fills = cycle.fills(inflow, stage)
+            self.empties = cycle.empties(inflow, stage)
+            self.pours = cycle.pours(inflow)
+            self.poured = inflow
+            self.cost += cycle.cost(inflow, stage)
+
+    def __len__(self):
+        return len(self.prefix) + self.fills + self.empties + self.pours
+
+    def __str__(self):
+        result = "".join("{}\n".format(self.start.world.action(kind, litres)) for kind, litres in self.prefix)
+        if self.source is not None:
+            other = jug.other_jug(self.source).value
+            result += "Fill Jug {} x {}, pour Jug {} into Jug {} x {} ({}l), empty Jug {} x {}\n".format(
+                self.source.value, self.fills, self.source.value, other, self.pours, self.poured, other, self.empties)
+        return result + "Cost: {}\n".format(self.cost)
+
+    def actions(self):
+        """Generate every (``WaterJugAction``, ``WaterJugState``) of the plan in order."""
+        world = self.start.world
+        state = self.start
+        for kind, litres in self.prefix:
+            state = state.apply_action(world.action(kind, litres))
+            yield world.action(kind, litres), state
+        if self.source is None:
+            return
+        # Variables
+        fill, pour, empty = (jug.FILL_A, jug.POUR_A, jug.EMPTY_B) if self.source is jug.Jug.A \
+            else (jug.FILL_B, jug.POUR_B, jug.EMPTY_A)
+        source_max = self.cycle.source_max
+        target_max = self.cycle.target_max
+        source, target = self.cycle.source, self.cycle.target
+        # Logic
+        for _ in range(len(self) - len(self.prefix)):
+            if source == 0:
+                action = world.action(fill, source_max)
+                source = source_max
+            elif target == target_max:
+                action = world.action(empty, target_max)
+                target = 0
+            else:
+                litres = min(source, target_max - target)
+                action = world.action(pour, litres)
+                source, target = source - litres, target + litres
+            a, b = (source, target) if self.source is jug.Jug.A else (target, source)
+            yield action, jug.WaterJugState(world, a, b)
+
+    def to_path(self):
+        """Return the plan as a ``Path``. This takes time and memory linear in the length of the plan."""
+        result = search.Path()
+        result.head = self.start
+        for action, state in self.actions():
+            result.list.append(search.ActionStatePair(action, state))
+        result.cost = float(self.cost)
+        return result
+
+
+def prefixes(start: jug.WaterJugState):
+    """
+    Generate every (prefix, cost, state) of doing nothing, filling or emptying jug A, then doing nothing,
+    filling or emptying jug B. These move the start onto the pour cycles of every reachable total modulo the gcd.
+    """
+    world = start.world
+    for kind_a in (None, jug.FILL_A, jug.EMPTY_A):
+        for kind_b in (None, jug.FILL_B, jug.EMPTY_B):
+            prefix = []
+            cost = 0
+            state = start
+            for kind in (kind_a, kind_b):
+                if kind is None:
+                    continue
+                action_type, action_jug = jug.ACTIONS[kind]
+                volume = state.get_volume(action_jug)
+                litres = state.get_capacity(action_jug) - volume if action_type == jug.ActionType.FILL else volume
+                if litres == 0:
+                    break
+                action = world.action(kind, litres)
+                prefix.append((kind, litres))
+                cost += action.cost
+                state = state.apply_action(action)
+            else:
+                yield prefix, cost, state
+
+
+def plan(start: jug.WaterJugState, goal: jug.WaterJugState):
+    """
+    Return the cheapest ``Plan`` from a given start to a given goal over every prefix and both pour directions,
+    or ``None`` if the goal is unreachable. Plans are not always optimal, but take O(log capacity) time to find.
+    """
+    if jug.unsolvable_reason(start, goal) is not None:
+        return None
+    world = start.world
+    best = Plan(start, goal, [], 0) if start == goal else None
+    for prefix, prefix_cost, state in prefixes(start):
+        if best is not None and prefix_cost >= best.cost:
+            continue
+        if state == goal:
+            best = Plan(start, goal, prefix, prefix_cost)
+            continue
+        # The pour cycle needs both jugs to hold something
+        if world.a_max == 0 or world.b_max == 0:
+            continue
+        for source in jug.Jug:
+            if source is jug.Jug.A:
+                cycle = PourCycle(world.a_max, world.b_max, state.a, state.b)
+                point = cycle.find(goal.a, goal.b)
+            else:
+                cycle = PourCycle(world.b_max, world.a_max, state.b, state.a)
+                point = cycle.find(goal.b, goal.a)
+            if point is None:
+                continue
+            candidate = Plan(start, goal, prefix, prefix_cost, source, cycle, point)
+            if best is None or candidate.cost < best.cost:
+                best = candidate
+    return best
@@ -0,0 +1,91 @@
+"""
+Heuristic tables for the Water Jug Problem.
+A ``HeuristicTable`` holds the exact cost to one goal from every configuration of a world with a jug empty or full,
+in one compact array, so h(n) is an O(1) lookup and A* Search only expands the nodes of an optimal path.
+A table is the cost array of the ``GoalTable`` of the goal from ``transitionTable.get_goal_table``,
+so one reverse Uniform-Cost Search from a goal serves both 'Table' queries and every informed search with that goal.
+Abstractions which project a configuration onto one jug or onto the total volume give lower bounds
+no tighter than the 'Markings' heuristic, so worlds above ``TABLE_THRESHOLD`` keep using 'Markings' instead.
+
+    WaterJugSearchProblemAStar.heuristic_tables = HeuristicTables()
+"""
+
+import collections
+import math
+import threading
+
+import cm3038.coursework.waterJugProblem as jug
+import cm3038.coursework.transitionTable as transition
+
+# Worlds with more configurations with a jug empty or full than this use the 'Markings' heuristic instead of a table
+TABLE_THRESHOLD = 200000
+
+# Max. no. of tables kept, the least recently used is dropped first
+TABLE_CACHE_SIZE = 32
+
+
+class HeuristicTable:
+    """
+    Models the exact cost to a fixed goal from every configuration of a world with a jug empty or full,
+    indexed by ``WaterJugWorld.boundary_id``. Configurations which can't reach the goal have a cost of -1.
+    """
+
+    def __init__(self, world: jug.WaterJugWorld, goal_id: int):
+        self.world = world
+        self.goal_id = goal_id
+        self.table = transition.get_table(world)
+        self.costs = transition.get_goal_table(world, goal_id).cost
+
+    def cost(self, state: jug.WaterJugState):
+        """Return the exact cost from a given ``WaterJugState`` to the goal, or infinity if it can't reach the goal."""
+        boundary_id = self.world.boundary_id(state.a, state.b)
+        if boundary_id < 0:
+            # Neither jug is empty or full, so the cheapest first step onto the boundary
+            result = math.inf
+            for _, target, cost in self.table.row(state):
+                if self.costs[target] >= 0:
+                    result = min(result, cost + self.costs[target])
+            return result
+        result = self.costs[boundary_id]
+        return math.inf if result < 0 else result
+
+
+class HeuristicTables:
+    """
+    Models a least-recently-used map from a goal to its ``HeuristicTable``, building each table on first use.
+    It is safe to share between threads.
+    """
+
+    def __init__(self, size=TABLE_CACHE_SIZE, threshold=TABLE_THRESHOLD):
+        self.size = size
+        self.threshold = threshold
+        self.tables = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def covers(self, goal: jug.WaterJugState):
+        """Return whether ``get()`` returns a table for a given goal, without building it."""
+        world = goal.world
+        return world.boundary_id(goal.a, goal.b) >= 0 and world.boundary_count() <= self.threshold
+
+    def get(self, goal: jug.WaterJugState):
+        """
+        Return the ``HeuristicTable`` of a given goal, or ``None`` if its world is larger than ``threshold``
+        or neither jug is empty or full in the goal, as then only a start which is the goal can reach it.
+        """
+        if not self.covers(goal):
+            return None
+        world = goal.world
+        goal_id = world.boundary_id(goal.a, goal.b)
+        key = (world, goal_id)
+        with self.lock:
+            result = self.tables.get(key)
+            if result is not None:
+                self.tables.move_to_end(key)
+                return result
+        result = HeuristicTable(world, goal_id)  # Built outside the lock, so other goals are not held up
+        with self.lock:
+            self.tables[key] = result
+            self.tables.move_to_end(key)
+            if len(self.tables) > self.size:
+                self.tables.popitem(last=False)
+        return result
@@ -0,0 +1,274 @@
+"""
+Water Jug Problem Solver for any number of jugs.
+States are packed into a single mixed-radix integer, so hashing and comparison stay cheap.
+The two-jug classes in ``waterJugProblem`` remain the faster specialisation for 2 jugs.
+"""
+
+import cm3038.search as search
+from cm3038.coursework.waterJugProblem import ActionType, GBFSearchProblem, AStarSearchProblem
+
+
+def jug_name(index: int):
+    """Return the name of the jug at a given index, i.e. A, B, C and so on."""
+    return chr(ord('A') + index)
+
+
+class MultiJugWorld:
+    """
+    Models the problem's constants, in this case the capacities of the jugs.
+    Also precomputes every (ActionType, source, target) action kind, in the order states generate them:
+    fill each jug, pour each jug into each other jug, then empty each jug.
+    """
+
+    __slots__ = ('capacities', 'weights', 'kinds', 'actions')
+
+    def __init__(self, capacities):
+        self.capacities = tuple(capacities)
+        # Mixed-radix place value of each jug, with jug A as the most significant digit
+        weights = []
+        weight = 1
+        for capacity in reversed(self.capacities):
+            weights.append(weight)
+            weight *= capacity + 1
+        self.weights = tuple(reversed(weights))
+        jugs = range(len(self.capacities))
+        self.kinds = tuple([(ActionType.FILL, i, None) for i in jugs] +
+                           [(ActionType.POUR, i, j) for i in jugs for j in jugs if i != j] +
+                           [(ActionType.EMPTY, i, None) for i in jugs])
+        self.actions = {}
+
+    def __eq__(self, other):
+        if not isinstance(other, MultiJugWorld):
+            return False
+        return self is other or self.capacities == other.capacities
+
+    def __hash__(self):
+        return hash(self.capacities)
+
+    def state_id(self, volumes):
+        """Return the unique mixed-radix integer id of the configuration with given volumes."""
+        return sum(volume * weight for volume, weight in zip(volumes, self.weights))
+
+    def volumes(self, state_id: int):
+        """Return the volumes of the configuration with a given id."""
+        result = []
+        for capacity in reversed(self.capacities):
+            state_id, volume = divmod(state_id, capacity + 1)
+            result.append(volume)
+        return tuple(reversed(result))
+
+    def action(self, kind: int, litres: int):
+        """Return the shared ``MultiJugAction`` for a given index into ``kinds`` which moves a given number of litres."""
+        key = litres * len(self.kinds) + kind
+        action = self.actions.get(key)
+        if action is None:
+            action_type, source, target = self.kinds[kind]
+            action = MultiJugAction(action_type, source, target, litres * action_type.value)
+            self.actions[key] = action
+        return action
+
+
+class MultiJugAction(search.Action):
+    """
+    Models an ``Action`` in terms of its ``ActionType``, the index of the jug to apply it to,
+    and for a pour the index of the jug receiving the water.
+    """
+
+    def __init__(self, action_type: ActionType, source: int, target=None, cost=1.0):
+        super().__init__()
+        self.action_type = action_type
+        self.source = source
+        self.target = target
+        self.cost = cost
+
+    def __str__(self):
+        if self.action_type == ActionType.FILL:
+            return "Fill Jug {} from the tap. Cost: {}".format(jug_name(self.source), self.cost)
+        if self.action_type == ActionType.POUR:
+            return "Pour Jug {} into Jug {}. Cost: {}".format(jug_name(self.source), jug_name(self.target), self.cost)
+        return "Empty Jug {} into the sink. Cost: {}".format(jug_name(self.source), self.cost)
+
+
+class MultiJugState(search.State):
+    """Models a ``State`` in terms of the volumes of the jugs, packed into ``id`` which is used as the hash."""
+
+    __slots__ = ('world', 'volumes', 'id')
+
+    def __init__(self, world: MultiJugWorld, volumes, state_id=None):
+        self.world = world
+        self.volumes = tuple(volumes)
+        self.id = world.state_id(self.volumes) if state_id is None else state_id
+
+    def __str__(self):
+        return "".join("Jug {}: {}/{}l \n".format(jug_name(i), volume, capacity)
+                       for i, (volume, capacity) in enumerate(zip(self.volumes, self.world.capacities)))
+
+    def __eq__(self, other):
+        if not isinstance(other, MultiJugState):
+            return False
+        return self.id == other.id and self.world == other.world
+
+    def __hash__(self):
+        return self.id
+
+    def successor(self):
+        """
+        Return a list of ``ActionStatePair``,
+        representing every possible ``MultiJugAction`` that can be performed on this ``MultiJugState``.
+        The id of each new state is the id of this state plus the litres moved times the change of place values,
+        so only possible transitions are computed and no state is unpacked.
+        """
+        # Variables
+        world = self.world
+        action = world.action
+        capacities = world.capacities
+        weights = world.weights
+        volumes = self.volumes
+        state_id = self.id
+        count = len(volumes)
+        result = []
+        kind = 0
+        # Logic
+        # If a jug is full, you can't fill it
+        for i in range(count):
+            litres = capacities[i] - volumes[i]
+            if litres > 0:
+                new_volumes = volumes[:i] + (capacities[i],) + volumes[i + 1:]
+                result.append(search.ActionStatePair(action(kind, litres),
+                                                     MultiJugState(world, new_volumes, state_id + litres * weights[i])))
+            kind += 1
+        # If the pouring jug is empty or the receiving jug is full, you can't pour
+        for i in range(count):
+            for j in range(count):
+                if i == j:
+                    continue
+                litres = min(volumes[i], capacities[j] - volumes[j])
+                if litres > 0:
+                    new_volumes = list(volumes)
+                    new_volumes[i] -= litres
+                    new_volumes[j] += litres
+                    result.append(search.ActionStatePair(
+                        action(kind, litres),
+                        MultiJugState(world, new_volumes, state_id + litres * (weights[j] - weights[i]))))
+                kind += 1
+        # If a jug is empty, you can't empty it
+        for i in range(count):
+            litres = volumes[i]
+            if litres > 0:
+                new_volumes = volumes[:i] + (0,) + volumes[i + 1:]
+                result.append(search.ActionStatePair(action(kind, litres),
+                                                     MultiJugState(world, new_volumes, state_id - litres * weights[i])))
+            kind += 1
+        return result
+
+
+def markings(state: MultiJugState, goal: MultiJugState):
+    """
+    Return the 'Markings' heuristic h(n) generalised to any number of jugs.
+    Litres missing from some jugs and surplus in others can be moved by pouring, the rest is filled or emptied.
+    For 2 jugs this is the same as the heuristic of ``WaterJugSearchProblemAStar``.
+    """
+    missing = 0
+    surplus = 0
+    for volume, goal_volume in zip(state.volumes, goal.volumes):
+        if volume < goal_volume:
+            missing += goal_volume - volume
+        else:
+            surplus += volume - goal_volume
+    pourable = min(missing, surplus)
+    return float((missing - pourable) * ActionType.FILL.value
+                 + pourable * ActionType.POUR.value
+                 + (surplus - pourable) * ActionType.EMPTY.value)
+
+
+def problem_str(start: MultiJugState, goal: MultiJugState):
+    """Return a one-line description of the problem from a given start to a given goal."""
+    def volumes_str(state):
+        return ", ".join("Jug {}: {}/{}l".format(jug_name(i), volume, capacity)
+                         for i, (volume, capacity) in enumerate(zip(state.volumes, state.world.capacities)))
+    return "Problem: \n{} -> {} \n".format(volumes_str(start), volumes_str(goal))
+
+
+class MultiJugSearchProblemBFS(search.SearchProblem):
+    """
+    A domain-dependent uninformed SearchProblem for the Water Jug Problem with any number of jugs.
+    This implementation uses Breadth-First Search.
+    """
+
+    fringeClass = search.QueueFringe
+    filterOnGeneration = True
+
+    def __init__(self, start: MultiJugState, goal: MultiJugState):
+        super().__init__(start)
+        self.start = start
+        self.goal = goal
+
+    def __str__(self):
+        return problem_str(self.start, self.goal)
+
+    def isGoal(self, state: MultiJugState):
+        return state == self.goal
+
+
+class MultiJugSearchProblemDFS(search.SearchProblem):
+    """
+    A domain-dependent uninformed SearchProblem for the Water Jug Problem with any number of jugs.
+    This implementation uses Depth-First Search.
+    """
+
+    fringeClass = search.StackFringe
+
+    def __init__(self, start: MultiJugState, goal: MultiJugState):
+        super().__init__(start)
+        self.start = start
+        self.goal = goal
+
+    def __str__(self):
+        return problem_str(self.start, self.goal)
+
+    def isGoal(self, state: MultiJugState):
+        return state == self.goal
+
+
+class MultiJugSearchProblemGBF(GBFSearchProblem):
+    """
+    A domain-dependent informed SearchProblem for the Water Jug Problem with any number of jugs.
+    This implementation uses Greedy Best-First Search with the 'Markings' heuristic.
+    """
+
+    def __init__(self, start: MultiJugState, goal: MultiJugState):
+        super().__init__(start, goal)
+        self.start = start
+        self.goal = goal
+
+    def __str__(self):
+        return problem_str(self.start, self.goal)
+
+    def isGoal(self, state: MultiJugState):
+        return state == self.goal
+
+    def heuristic(self, state: MultiJugState):
+        """Return the result of the 'Markings' heuristic function h(n), where n is a given ``MultiJugState``."""
+        return markings(state, self.goal)
+
+
+class MultiJugSearchProblemAStar(AStarSearchProblem):
+    """
+    A domain-dependent informed SearchProblem for the Water Jug Problem with any number of jugs.
+    This implementation uses A* Search with the 'Markings' heuristic.
+    """
+
+    def __init__(self, start: MultiJugState, goal: MultiJugState):
+        super().__init__(start, goal)
+        self.start = start
+        self.goal = goal
+
+    def __str__(self):
+        return problem_str(self.start, self.goal)
+
+    def isGoal(self, state: MultiJugState):
+        return state == self.goal
+
+    def heuristic(self, state: MultiJugState):
+        """Return the result of the 'Markings' heuristic function h(n), where n is a given ``MultiJugState``."""
+        return markings(state, self.goal)
@@ -0,0 +1,190 @@
+"""
+Persistent solution cache for the Water Jug Problem.
+Solutions are kept in an SQLite database keyed by (a_max, b_max, start, goal, algorithm),
+so reruns of overlapping jobs skip the search. A ``Path`` is stored as its cost and one byte per action,
+the index of the action into ``ACTIONS``, and is rebuilt by replaying the actions from the start.
+The database is in write-ahead logging mode, so any no. of processes may read and write it at once.
+Each process opens its own connection, and the least recently used solutions are dropped beyond ``max_entries``.
+
+    cache = PathCache('solutions.db')
+    WaterJugSearchProblemAStar.path_cache = cache   # or any other problem class, or PathCacheCheck for all
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import cm3038.search as search
+import cm3038.coursework.waterJugProblem as jug
+
+# Max. no. of solutions kept, the least recently used are dropped first
+MAX_ENTRIES = 1000000
+
+# Seconds a connection waits for another process to finish writing before giving up
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS paths (
+    a_max INTEGER NOT NULL,
+    b_max INTEGER NOT NULL,
+    start_a INTEGER NOT NULL,
+    start_b INTEGER NOT NULL,
+    goal_a INTEGER NOT NULL,
+    goal_b INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    cost REAL NOT NULL,
+    actions BLOB NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (a_max, b_max, start_a, start_b, goal_a, goal_b, algorithm)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS paths_used ON paths (used);
+CREATE TABLE IF NOT EXISTS size (entries INTEGER NOT NULL);
+INSERT INTO size SELECT 0 WHERE NOT EXISTS (SELECT * FROM size);
+CREATE TRIGGER IF NOT EXISTS paths_insert AFTER INSERT ON paths BEGIN
+    UPDATE size SET entries = entries + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS paths_delete AFTER DELETE ON paths BEGIN
+    UPDATE size SET entries = entries - 1;
+END;
+"""
+
+KEY_COLUMNS = ('a_max', 'b_max', 'start_a', 'start_b', 'goal_a', 'goal_b', 'algorithm')
+KEY = " AND ".join(column + " = ?" for column in KEY_COLUMNS)
+
+# Index into ``ACTIONS`` of every (ActionType, Jug)
+ACTION_KINDS = {action: kind for kind, action in enumerate(jug.ACTIONS)}
+
+
+def encode_path(path: search.Path):
+    """Return the actions of a given ``Path`` as bytes, one index into ``ACTIONS`` per action."""
+    return bytes(ACTION_KINDS[(pair.action.action_type, pair.action.jug)] for pair in path.list)
+
+
+def decode_path(start: jug.WaterJugState, actions: bytes):
+    """Return the ``Path`` from a given start by replaying actions encoded by ``encode_path``."""
+    # Variables
+    world = start.world
+    action = world.action
+    a_max = world.a_max
+    b_max = world.b_max
+    a = start.a
+    b = start.b
+    result = search.Path()
+    result.head = start
+    pairs = result.list
+    # Logic
+    # The volumes are computed inline as in ``WaterJugState.successor``, as a plan may have thousands of actions
+    for kind in actions:
+        if kind == jug.FILL_A:
+            litres = a_max - a
+            a = a_max
+        elif kind == jug.FILL_B:
+            litres = b_max - b
+            b = b_max
+        elif kind == jug.POUR_A:
+            litres = min(a, b_max - b)
+            a, b = a - litres, b + litres
+        elif kind == jug.POUR_B:
+            litres = min(b, a_max - a)
+            a, b = a + litres, b - litres
+        elif kind == jug.EMPTY_A:
+            litres = a
+            a = 0
+        else:
+            litres = b
+            b = 0
+        pairs.append(search.ActionStatePair(action(kind, litres), jug.WaterJugState(world, a, b)))
+        result.cost += pairs[-1].action.cost
+    return result
+
+
+class PathCache:
+    """
+    Models a size-bounded, least-recently-used map from a problem to its solution ``Path``, in an SQLite file.
+    It is safe to share between threads, and between processes, each of which connects on first use.
+    """
+
+    def __init__(self, filename: str, max_entries=MAX_ENTRIES):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = None
+        self.pid = None  # The process which opened the connection, as a connection can't be used after a fork
+
+    def __getstate__(self):
+        """Return the state to pickle, without the connection, so the cache can be sent to worker processes."""
+        return {'filename': self.filename, 'max_entries': self.max_entries}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state['filename'], state['max_entries'])
+
+    def connect(self):
+        """Return the connection of this process, opening it and creating the tables on first use."""
+        if self.connection is None or self.pid != os.getpid():
+            connection = sqlite3.connect(self.filename, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # A crash may lose the last solutions, but never corrupt
+            try:
+                connection.executescript("BEGIN IMMEDIATE;" + SCHEMA + "COMMIT;")
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self.connection = connection
+            self.pid = os.getpid()
+        return self.connection
+
+    def close(self):
+        """Close the connection of this process, if it is open."""
+        with self.lock:
+            if self.connection is not None and self.pid == os.getpid():
+                self.connection.close()
+            self.connection = None
+
+    @staticmethod
+    def key(start: jug.WaterJugState, goal: jug.WaterJugState, algorithm: str):
+        """Return the values of the primary key of a problem."""
+        return start.world.a_max, start.world.b_max, start.a, start.b, goal.a, goal.b, algorithm
+
+    def get(self, start: jug.WaterJugState, goal: jug.WaterJugState, algorithm: str):
+        """Return the cached ``Path`` from a given start to a given goal found by a given algorithm, or ``None``."""
+        key = self.key(start, goal, algorithm)
+        with self.lock:
+            connection = self.connect()
+            row = connection.execute("SELECT actions FROM paths WHERE " + KEY, key).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE paths SET used = ? WHERE " + KEY, (time.time_ns(),) + key)
+        result = decode_path(start, row[0])
+        end = result.list[-1].state if result.list else start
+        if end != goal:  # Written by an incompatible version, so search again
+            return None
+        return result
+
+    def put(self, start: jug.WaterJugState, goal: jug.WaterJugState, algorithm: str, path: search.Path):
+        """Cache the ``Path`` from a given start to a given goal found by a given algorithm,
+        dropping the least recently used solutions beyond ``max_entries``."""
+        key = self.key(start, goal, algorithm)
+        with self.lock:
+            connection = self.connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("INSERT INTO paths VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                                   "ON CONFLICT DO UPDATE SET cost = excluded.cost, actions = excluded.actions, "
+                                   "used = excluded.used",
+                                   key + (path.cost, encode_path(path), time.time_ns()))
+                excess = connection.execute("SELECT entries FROM size").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    columns = ", ".join(KEY_COLUMNS)
+                    connection.execute("DELETE FROM paths WHERE (" + columns + ") IN "
+                                       "(SELECT " + columns + " FROM paths ORDER BY used LIMIT ?)", (excess,))
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+
+    def __len__(self):
+        with self.lock:
+            return self.connect().execute("SELECT entries FROM size").fetchone()[0]
+
@@ -0,0 +1,204 @@
+"""
+Benchmark suite for the Water Jug Problem solvers.
+Sweeps jug capacities and start/goal pairs over the BFS, DFS, GBF and A* problems,
+and writes one JSON record per run, so results can be compared across commits:
+
+    python -m cm3038.coursework.test.benchmark --output before.json
+    python -m cm3038.coursework.test.benchmark --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cm3038.search as search
+import cm3038.coursework.waterJugProblem as jug
+import cm3038.coursework.transitionTable as transition
+
+ALGORITHMS = {
+    'BFS': jug.WaterJugSearchProblemBFS,
+    'DFS': jug.WaterJugSearchProblemDFS,
+    'GBF': jug.WaterJugSearchProblemGBF,
+    'AStar': jug.WaterJugSearchProblemAStar,
+}
+
+# (name, a_max, b_max, start, goal), where start and goal are (a, b) volumes
+CASES = (
+    ('small-coprime', 5, 3, (0, 0), (4, 0)),
+    ('small-coprime-reverse', 5, 3, (4, 3), (0, 1)),
+    ('small-coprime-start-is-goal', 5, 3, (2, 3), (2, 3)),
+    ('small-non-coprime', 6, 4, (0, 0), (2, 0)),
+    ('small-non-coprime-unreachable', 6, 4, (0, 0), (3, 0)),
+    ('small-interior-unreachable', 5, 3, (0, 0), (2, 1)),
+    ('medium-coprime', 7, 11, (0, 0), (6, 0)),
+    ('medium-non-coprime', 12, 18, (0, 0), (0, 6)),
+    ('large-coprime', 301, 97, (0, 0), (150, 0)),
+    ('large-non-coprime', 300, 96, (0, 0), (0, 12)),
+    ('large-non-coprime-unreachable', 300, 96, (0, 0), (0, 13)),
+    ('huge-coprime', 3001, 997, (0, 0), (1500, 0)),
+    ('huge-interior-start', 3001, 997, (1000, 500), (0, 1)),
+    ('very-large-coprime', 1000003, 999983, (0, 0), (500000, 0)),
+)
+
+# Beyond this no. of expanded nodes a run is stopped and recorded as 'budget-exceeded'
+NODE_LIMIT = 200000
+
+# A run is a regression if it is this many times slower, or visits more nodes, than the baseline
+TIME_TOLERANCE = 1.5
+# Runs faster than this are too noisy to compare times
+MIN_SECONDS = 0.01
+
+
+def ground_truth(start: jug.WaterJugState, goal: jug.WaterJugState):
+    """
+    Return the optimal cost from a given start to a given goal using the ``GoalTable``,
+    ``None`` if there is no solution, or ``float('nan')`` if the capacities are too large for the table.
+    """
+    if goal.world.boundary_count() > transition.PLANNER_THRESHOLD:
+        return float('nan')
+    path = transition.solve_from(start, goal)
+    return None if path is None else path.cost
+
+
+def run_once(problem_class, start: jug.WaterJugState, goal: jug.WaterJugState, node_limit: int):
+    """Solve a new problem of a given class and return its ``SearchResult``."""
+    problem = problem_class(start, goal)
+    problem.nodeLimit = node_limit
+    return problem.solve()
+
+
+def benchmark(name: str, algorithm: str, a_max: int, b_max: int, start, goal, repeat: int, node_limit: int):
+    """
+    Return a dict recording a given algorithm on a given case:
+    the best wall time of ``repeat`` runs, nodes visited, peak memory traced in a separate run,
+    solution cost and whether it is optimal.
+    """
+    world = jug.WaterJugWorld(a_max, b_max)
+    start_state = jug.WaterJugState(world, *start)
+    goal_state = jug.WaterJugState(world, *goal)
+    problem_class = ALGORITHMS[algorithm]
+    # Time
+    seconds = None
+    result = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = run_once(problem_class, start_state, goal_state, node_limit)
+        elapsed = time.perf_counter() - begin
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+    # Memory, traced separately as tracing slows the search down
+    tracemalloc.start()
+    run_once(problem_class, start_state, goal_state, node_limit)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Optimality
+    cost = None if result.path is None else result.path.cost
+    optimal_cost = ground_truth(start_state, goal_state)
+    if optimal_cost != optimal_cost:  # NaN, no ground truth
+        optimal_cost = None
+        optimal = None
+    elif result.status == search.SearchResult.BUDGET_EXCEEDED:
+        optimal = None
+    else:
+        optimal = cost == optimal_cost
+    return {
+        'case': name,
+        'algorithm': algorithm,
+        'a_max': a_max,
+        'b_max': b_max,
+        'start': list(start),
+        'goal': list(goal),
+        'status': result.status,
+        'seconds': seconds,
+        'nodes_visited': result.nodeVisited,
+        'nodes_expanded': result.nodeExpanded,
+        'peak_memory_bytes': peak_memory,
+        'cost': cost,
+        'optimal_cost': optimal_cost,
+        'optimal': optimal,
+    }
+
+
+def git_commit():
+    """Return the hash of the current git commit, or ``None`` outside a git repository."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(algorithms=tuple(ALGORITHMS), cases=CASES, repeat=3, node_limit=NODE_LIMIT):
+    """Run every given algorithm on every given case and return the report as a dict."""
+    runs = []
+    for name, a_max, b_max, start, goal in cases:
+        for algorithm in algorithms:
+            runs.append(benchmark(name, algorithm, a_max, b_max, start, goal, repeat, node_limit))
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'node_limit': node_limit,
+        'runs': runs,
+    }
+
+
+def compare(baseline: dict, report: dict, tolerance=TIME_TOLERANCE):
+    """
+    Return a list of messages, one per run of a report which regressed against a baseline report:
+    a different status or cost, more nodes visited, or more than ``tolerance`` times slower and over ``MIN_SECONDS``.
+    """
+    old_runs = {(run['case'], run['algorithm']): run for run in baseline['runs']}
+    result = []
+    for run in report['runs']:
+        old = old_runs.get((run['case'], run['algorithm']))
+        if old is None:
+            continue
+        label = "{} {}".format(run['algorithm'], run['case'])
+        if run['status'] != old['status']:
+            result.append("{}: status {} -> {}".format(label, old['status'], run['status']))
+        elif run['cost'] != old['cost']:
+            result.append("{}: cost {} -> {}".format(label, old['cost'], run['cost']))
+        if run['nodes_visited'] > old['nodes_visited']:
+            result.append("{}: nodes visited {} -> {}".format(label, old['nodes_visited'], run['nodes_visited']))
+        if run['seconds'] > old['seconds'] * tolerance and run['seconds'] > MIN_SECONDS:
+            result.append("{}: seconds {:.4f} -> {:.4f}".format(label, old['seconds'], run['seconds']))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Water Jug Problem solvers.")
+    parser.add_argument('--output', help="file to write the JSON report to, standard output by default")
+    parser.add_argument('--compare', help="JSON report of a baseline to check the new report against")
+    parser.add_argument('--algorithm', action='append', choices=sorted(ALGORITHMS),
+                        help="algorithm to run, may be repeated, all by default")
+    parser.add_argument('--case', action='append', choices=[case[0] for case in CASES],
+                        help="case to run, may be repeated, all by default")
+    parser.add_argument('--repeat', type=int, default=3, help="no. of timed runs, the fastest is kept")
+    parser.add_argument('--node-limit', type=int, default=NODE_LIMIT, help="max. no. of nodes expanded per run")
+    args = parser.parse_args(argv)
+    algorithms = args.algorithm or tuple(ALGORITHMS)
+    cases = [case for case in CASES if args.case is None or case[0] in args.case]
+    report = run_suite(algorithms, cases, args.repeat, args.node_limit)
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(text + "\n")
+    if args.compare is not None:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), report)
+        for message in regressions:
+            print(message, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Exhaustive check of every search engine against Dijkstra's algorithm and Breadth-First Search, for every small world.
+For all capacities up to ``MAX_CAPACITY``, every start and every goal, each engine must find a path exactly when
+the goal is reachable, and the path must replay through legal actions to the goal at the cost it claims.
+The engines which promise it must find the cheapest path, or the path with the fewest actions.
+The fringe, re-parenting of nodes, ARA* bounds and search limits are checked on their own.
+
+    python -m pytest cm3038/coursework/test/test_engines.py
+    python -m cm3038.coursework.test.test_engines
+"""
+
+import collections
+import heapq
+import sys
+
+import cm3038.search as search
+import cm3038.informed.search as informed
+import cm3038.coursework.waterJugProblem as jug
+import cm3038.coursework.transitionTable as transition
+
+MAX_CAPACITY = 5
+
+# Engines which must find the cheapest path
+COST_OPTIMAL = (jug.WaterJugSearchProblemAStar, jug.WaterJugSearchProblemIDAStar,
+                jug.WaterJugSearchProblemBidirectionalUCS)
+
+# Engines which must find the path with the fewest actions
+DEPTH_OPTIMAL = (jug.WaterJugSearchProblemBFS, jug.WaterJugSearchProblemIDDFS,
+                 jug.WaterJugSearchProblemBidirectional)
+
+# Engines which must find a path, but not a particular one
+COMPLETE = (jug.WaterJugSearchProblemDFS, jug.WaterJugSearchProblemGBF)
+
+
+def optimal_costs(start: jug.WaterJugState):
+    """Return a dict from every ``WaterJugState`` reachable from a given start to its optimal cost, by Dijkstra's algorithm."""
+    result = {start: 0}
+    fringe = [(0, start.id, start)]
+    while fringe:
+        cost, _, state = heapq.heappop(fringe)
+        if cost > result[state]:
+            continue
+        for pair in state.successor():
+            next_cost = cost + pair.action.cost
+            if pair.state not in result or next_cost < result[pair.state]:
+                result[pair.state] = next_cost
+                heapq.heappush(fringe, (next_cost, pair.state.id, pair.state))
+    return result
+
+
+def fewest_actions(start: jug.WaterJugState):
+    """Return a dict from every ``WaterJugState`` reachable from a given start to its fewest actions, by BFS."""
+    result = {start: 0}
+    fringe = collections.deque([start])
+    while fringe:
+        state = fringe.popleft()
+        for pair in state.successor():
+            if pair.state not in result:
+                result[pair.state] = result[state] + 1
+                fringe.append(pair.state)
+    return result
+
+
+def check_path(path: search.Path, start: jug.WaterJugState, goal: jug.WaterJugState):
+    """Return a message if a given ``Path`` does not lead from a given start to a given goal, or ``None``."""
+    state = start
+    cost = 0
+    for pair in path.list:
+        legal = [successor for successor in state.successor()
+                 if successor.state == pair.state and successor.action.cost == pair.action.cost]
+        if not legal:
+            return "illegal action {} from {}".format(pair.action, state)
+        state = pair.state
+        cost += pair.action.cost
+    if state != goal:
+        return "path ends at {}".format(state)
+    if abs(cost - path.cost) > 1e-9:
+        return "path claims cost {}, replays as {}".format(path.cost, cost)
+    return None
+
+
+def check_engine(name: str, path, start, goal, costs: dict, depths: dict, optimality=None):
+    """
+    Return a message if the path found by an engine is wrong, given the optimal costs and depths from the start,
+    or ``None``. ``optimality`` is 'cost', 'depth' or ``None`` for any path.
+    """
+    prefix = "{} {} -> {}: ".format(name, start, goal)
+    if (path is None) != (goal not in costs):
+        return prefix + "found {}, but the goal is {}".format(
+            "no path" if path is None else "a path", "reachable" if goal in costs else "unreachable")
+    if path is None:
+        return None
+    message = check_path(path, start, goal)
+    if message is not None:
+        return prefix + message
+    if optimality == 'cost' and abs(path.cost - costs[goal]) > 1e-9:
+        return prefix + "cost {}, optimal cost {}".format(path.cost, costs[goal])
+    if optimality == 'depth' and len(path.list) != depths[goal]:
+        return prefix + "{} actions, fewest {}".format(len(path.list), depths[goal])
+    return None
+
+
+def all_states(world: jug.WaterJugWorld):
+    """Return the list of every ``WaterJugState`` of a given world."""
+    return [jug.WaterJugState(world, a, b) for a in range(world.a_max + 1) for b in range(world.b_max + 1)]
+
+
+def check_all(max_capacity=MAX_CAPACITY):
+    """Return (list of failure messages, no. of problems checked) over every small world."""
+    failures = []
+    checked = 0
+    engines = [(problem_class, 'cost') for problem_class in COST_OPTIMAL] + \
+              [(problem_class, 'depth') for problem_class in DEPTH_OPTIMAL] + \
+              [(problem_class, None) for problem_class in COMPLETE]
+    for a_max in range(max_capacity + 1):
+        for b_max in range(max_capacity + 1):
+            states = all_states(jug.WaterJugWorld(a_max, b_max))
+            for start in states:
+                costs = optimal_costs(start)
+                depths = fewest_actions(start)
+                for goal in states:
+                    checked += 1
+                    results = [(problem_class.__name__, problem_class(start, goal).search(), optimality)
+                               for problem_class, optimality in engines]
+                    # The original sorted-list fringe must agree with the heap
+                    problem = jug.WaterJugSearchProblemAStar(start, goal)
+                    problem.fringeClass = informed.ListFringe
+                    results.append(("AStar with ListFringe", problem.search(), 'cost'))
+                    # The transition table engine, and the table of the goal
+                    results.append(("Table", transition.solve_from(start, goal), 'cost'))
+                    for problem_class, optimality in engines:
+                        if problem_class in (jug.WaterJugSearchProblemBFS, jug.WaterJugSearchProblemDFS,
+                                             jug.WaterJugSearchProblemAStar, jug.WaterJugSearchProblemGBF):
+                            results.append(("Table " + problem_class.__name__,
+                                            transition.solve(problem_class(start, goal)), optimality))
+                    for name, path, optimality in results:
+                        message = check_engine(name, path, start, goal, costs, depths, optimality)
+                        if message is not None:
+                            failures.append(message)
+    return failures, checked
+
+
+def test_engines_find_valid_optimal_paths():
+    failures, _ = check_all()
+    assert failures == [], "\n".join(failures[:10])
+
+
+class FixedValues:
+    """Stands in for a best-first search problem, with f(n) given per node."""
+
+    def __init__(self, values: dict):
+        self.values = values
+
+    def nodeValue(self, node):
+        return self.values[node]
+
+
+def test_heap_fringe_order():
+    world = jug.WaterJugWorld(5, 3)
+    root = search.Node(jug.WaterJugState(world, 0, 0), None, None)
+    other_root = search.Node(jug.WaterJugState(world, 0, 0), None, None)
+    fill_a, fill_b = root.state.successor()[0], root.state.successor()[1]
+    first = search.Node(fill_a.state, root, fill_a.action)
+    second = search.Node(fill_b.state, root, fill_b.action)
+    pair = first.state.successor()[-1]
+    deep = search.Node(pair.state, first, pair.action)
+    assert deep.getCost() > first.getCost() > root.getCost()
+    # Lower f(n) first, then higher g(n), then the most recently added
+    values = {root: 10, first: 10, second: 5, deep: 10, other_root: 10}
+    fringe = informed.HeapFringe(FixedValues(values))
+    for node in (root, first, second, deep, other_root):
+        fringe.add(node)
+    assert [fringe.pop() for _ in range(6)] == [second, deep, first, other_root, root, None]
+    # A node whose f(n) drops moves ahead, and its old entry is never popped
+    for node in (first, second):
+        fringe.add(node)
+    values[first] = 1
+    assert fringe.update(first)
+    assert len(fringe) == 2 and first in fringe
+    assert [fringe.pop(), fringe.pop(), fringe.pop()] == [first, second, None]
+    assert not fringe.update(first)
+
+
+def test_set_parent_propagates():
+    world = jug.WaterJugWorld(5, 3)
+    root = search.Node(jug.WaterJugState(world, 0, 0), None, None)
+    fill_a, fill_b = root.state.successor()[0], root.state.successor()[1]
+    expensive = search.Node(fill_a.state, root, fill_a.action)
+    root.addChildNode(expensive)
+    cheap = search.Node(fill_b.state, root, fill_b.action)
+    root.addChildNode(cheap)
+    # A chain of descendants below the expensive node
+    chain = [expensive]
+    for _ in range(3):
+        pair = chain[-1].state.successor()[-1]
+        child = search.Node(pair.state, chain[-1], pair.action)
+        chain[-1].addChildNode(child)
+        child.value = 123  # A stale f(n)
+        chain.append(child)
+    pair = cheap.state.successor()[0]
+    updated = chain[1].setParent(cheap, pair.action)
+    assert updated == chain[1:]
+    assert chain[1].parent is cheap and chain[1] in cheap.children and chain[1] not in expensive.children
+    for node in chain[1:]:
+        assert node.getCost() == node.parent.getCost() + node.action.cost
+        assert node.getDepth() == node.parent.getDepth() + 1
+        assert node.value is None
+
+
+def test_anytime_bounds():
+    for a_max in range(1, MAX_CAPACITY + 1):
+        for b_max in range(1, a_max + 1):
+            states = all_states(jug.WaterJugWorld(a_max, b_max))
+            for start in states:
+                costs = optimal_costs(start)
+                for goal in states:
+                    results = list(jug.WaterJugSearchProblemAStar(start, goal).anytime_search())
+                    assert (results == []) == (goal not in costs)
+                    for path, bound in results:
+                        assert check_path(path, start, goal) is None
+                        assert path.cost <= bound * costs[goal] + 1e-9
+                    if results:
+                        assert abs(results[-1][0].cost - costs[goal]) < 1e-9
+
+
+def test_limits():
+    world = jug.WaterJugWorld(3001, 997)
+    start = jug.WaterJugState(world, 0, 0)
+    goal = jug.WaterJugState(world, 1, 0)
+    for problem_class in COST_OPTIMAL + DEPTH_OPTIMAL + COMPLETE:
+        problem = problem_class(start, goal)
+        problem.nodeLimit = 50
+        result = problem.solve()
+        assert result.status == search.SearchResult.BUDGET_EXCEEDED and result.limit == "nodes", problem_class
+        assert result.nodeExpanded == 51 and result.bestNode is not None, problem_class
+        # Counters start again with each search
+        again = problem.solve()
+        assert (again.nodeVisited, again.nodeExpanded) == (result.nodeVisited, result.nodeExpanded), problem_class
+        problem = problem_class(start, goal)
+        problem.timeLimit = 0.0
+        assert problem.solve().limit == "time", problem_class
+    problem = jug.WaterJugSearchProblemAStar(start, goal)
+    problem.nodeLimit = 50
+    assert list(problem.anytime_search()) == [] and problem.limit == "nodes" and problem.nodeExpanded == 51
+
+
+if __name__ == "__main__":
+    failures, checked = check_all()
+    for message in failures:
+        print(message)
+    print("{} problems checked, {} failures".format(checked, len(failures)))
+    sys.exit(1 if failures else 0)
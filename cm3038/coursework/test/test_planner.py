@@ -0,0 +1,107 @@
+"""
+Exhaustive check of the closed-form planner against optimal costs, for every small world.
+For all capacities up to ``MAX_CAPACITY``, every start and every goal, a plan must exist exactly when
+the goal is reachable, replay through legal actions to the goal, and cost what it claims, which is never below optimal.
+
+    python -m pytest cm3038/coursework/test/test_planner.py
+    python -m cm3038.coursework.test.test_planner
+"""
+
+import heapq
+import sys
+
+import cm3038.coursework.waterJugProblem as jug
+import cm3038.coursework.euclidPlanner as planner
+
+MAX_CAPACITY = 9
+
+
+def optimal_costs(start: jug.WaterJugState):
+    """Return a dict from every ``WaterJugState`` reachable from a given start to its optimal cost, by Dijkstra's algorithm."""
+    result = {start: 0}
+    fringe = [(0, start.id, start)]
+    while fringe:
+        cost, _, state = heapq.heappop(fringe)
+        if cost > result[state]:
+            continue
+        for pair in state.successor():
+            next_cost = cost + pair.action.cost
+            if pair.state not in result or next_cost < result[pair.state]:
+                result[pair.state] = next_cost
+                heapq.heappush(fringe, (next_cost, pair.state.id, pair.state))
+    return result
+
+
+def check_plan(start: jug.WaterJugState, goal: jug.WaterJugState, optimal):
+    """Return a message if the plan from a given start to a given goal is wrong, given the optimal cost or ``None``."""
+    plan = planner.plan(start, goal)
+    if (plan is None) != (optimal is None):
+        return "{} -> {}: plan {}, optimal cost {}".format(start, goal, plan, optimal)
+    if plan is None:
+        return None
+    state = start
+    cost = 0
+    steps = 0
+    for action, next_state in plan.actions():
+        legal = [pair.state for pair in state.successor() if pair.action is action]
+        if legal != [next_state]:
+            return "{} -> {}: illegal action {} from {}".format(start, goal, action, state)
+        state = next_state
+        cost += action.cost
+        steps += 1
+    if state != goal:
+        return "{} -> {}: plan ends at {}".format(start, goal, state)
+    if cost != plan.cost or steps != len(plan):
+        return "{} -> {}: plan claims cost {} in {} actions, replays as {} in {}".format(
+            start, goal, plan.cost, len(plan), cost, steps)
+    if plan.cost < optimal:
+        return "{} -> {}: plan cost {} is below the optimal cost {}".format(start, goal, plan.cost, optimal)
+    return None
+
+
+def check_all(max_capacity=MAX_CAPACITY):
+    """Return (list of failure messages, no. of plans checked, no. of optimal plans) over every small world."""
+    failures = []
+    checked = 0
+    optimal_count = 0
+    for a_max in range(max_capacity + 1):
+        for b_max in range(max_capacity + 1):
+            world = jug.WaterJugWorld(a_max, b_max)
+            for a in range(a_max + 1):
+                for b in range(b_max + 1):
+                    start = jug.WaterJugState(world, a, b)
+                    costs = optimal_costs(start)
+                    for goal_a in range(a_max + 1):
+                        for goal_b in range(b_max + 1):
+                            goal = jug.WaterJugState(world, goal_a, goal_b)
+                            optimal = costs.get(goal)
+                            # The gcd check must agree with the exhaustive search
+                            if (jug.unsolvable_reason(start, goal) is None) != (optimal is not None):
+                                failures.append("{} -> {}: gcd check disagrees with search".format(start, goal))
+                                continue
+                            message = check_plan(start, goal, optimal)
+                            checked += 1
+                            if message is not None:
+                                failures.append(message)
+                            elif optimal is not None and planner.plan(start, goal).cost == optimal:
+                                optimal_count += 1
+    return failures, checked, optimal_count
+
+
+def test_plans_are_valid():
+    failures, _, _ = check_all()
+    assert failures == [], "\n".join(failures[:10])
+
+
+def test_huge_plan_is_compressed():
+    world = jug.WaterJugWorld(10 ** 9 + 7, 10 ** 9 - 3)
+    plan = planner.plan(jug.WaterJugState(world, 0, 0), jug.WaterJugState(world, 1, 0))
+    assert plan is not None and len(plan) > 10 ** 9
+
+
+if __name__ == "__main__":
+    failures, checked, optimal_count = check_all()
+    for message in failures:
+        print(message)
+    print("{} plans checked, {} failures, {} optimal".format(checked, len(failures), optimal_count))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,68 @@
+"""
+Parity check of the transition table engine against the search problems it stands in for, for every small world.
+For all capacities up to ``MAX_CAPACITY``, every start and every goal, ``transitionTable.solve()`` must return
+the same path as ``search()`` of the same uninformed problem, after visiting the same no. of nodes.
+
+    python -m pytest cm3038/coursework/test/test_transition.py
+    python -m cm3038.coursework.test.test_transition
+"""
+
+import sys
+
+import cm3038.coursework.waterJugProblem as jug
+import cm3038.coursework.transitionTable as transition
+
+MAX_CAPACITY = 7
+
+PROBLEM_CLASSES = (jug.WaterJugSearchProblemBFS, jug.WaterJugSearchProblemDFS)
+
+
+def states(path):
+    """Return the list of states of a given ``Path``, or ``None``."""
+    return None if path is None else [path.head] + [pair.state for pair in path.list]
+
+
+def check_parity(problem_class, start: jug.WaterJugState, goal: jug.WaterJugState):
+    """Return a message if the table engine and the search of a given problem class disagree, or ``None``."""
+    problem = problem_class(start, goal)
+    expected = states(problem.search())
+    table_problem = problem_class(start, goal)
+    actual = states(transition.solve(table_problem))
+    if actual != expected:
+        return "{} {} -> {}: table path {}, search path {}".format(
+            problem_class.__name__, start, goal, actual, expected)
+    if table_problem.rejection is None and table_problem.nodeVisited != problem.nodeVisited:
+        return "{} {} -> {}: table visited {} nodes, search {}".format(
+            problem_class.__name__, start, goal, table_problem.nodeVisited, problem.nodeVisited)
+    return None
+
+
+def check_all(max_capacity=MAX_CAPACITY):
+    """Return (list of failure messages, no. of problems checked) over every small world."""
+    failures = []
+    checked = 0
+    for a_max in range(max_capacity + 1):
+        for b_max in range(max_capacity + 1):
+            world = jug.WaterJugWorld(a_max, b_max)
+            all_states = [jug.WaterJugState(world, a, b) for a in range(a_max + 1) for b in range(b_max + 1)]
+            for start in all_states:
+                for goal in all_states:
+                    for problem_class in PROBLEM_CLASSES:
+                        message = check_parity(problem_class, start, goal)
+                        checked += 1
+                        if message is not None:
+                            failures.append(message)
+    return failures, checked
+
+
+def test_table_matches_search():
+    failures, _ = check_all()
+    assert failures == [], "\n".join(failures[:10])
+
+
+if __name__ == "__main__":
+    failures, checked = check_all()
+    for message in failures:
+        print(message)
+    print("{} problems checked, {} failures".format(checked, len(failures)))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,484 @@
+"""
+Precomputed transition tables for the Water Jug Problem.
+The successor graph of a ``WaterJugWorld`` is built once, then searched over integer state ids
+instead of expanding ``WaterJugState`` objects. Tables are cached per world and reused across queries.
+Only configurations with a jug empty or full are indexed, as every successor of any state is one of them,
+so a table takes O(a_max + b_max) memory. A start with neither jug empty nor full is expanded on its own.
+"""
+
+import array
+import functools
+import heapq
+from collections import deque
+
+import cm3038.search as search
+import cm3038.informed.search as informed
+import cm3038.coursework.waterJugProblem as jug
+import cm3038.coursework.euclidPlanner as planner
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, without it the table is built in pure Python
+    numpy = None
+
+# Worlds with more boundary configurations than this are solved by the closed-form planner instead of a table
+PLANNER_THRESHOLD = 2000000
+
+# Plans of the closed-form planner with more actions than this are not expanded into a ``Path``
+MAX_PLAN_LENGTH = 100000
+
+
+class PlanTooLongException(Exception):
+    """
+    Raised when a plan of the closed-form planner has too many actions to be expanded into a ``Path``.
+    The compressed ``Plan`` is kept in ``plan``, so its actions can still be streamed with ``Plan.actions()``.
+    """
+
+    def __init__(self, plan):
+        super().__init__("The plan has {} actions, more than the {} a path may have.".format(len(plan),
+                                                                                          MAX_PLAN_LENGTH))
+        self.plan = plan
+
+
+class TransitionTable:
+    """
+    Models the successor graph of a ``WaterJugWorld`` over the configurations with a jug empty or full,
+    indexed by ``WaterJugWorld.boundary_id``.
+    Entry ``state_id * width + kind`` of ``targets`` and ``costs`` holds the result of the action ``ACTIONS[kind]``
+    applied to the state with id ``state_id``. Impossible actions have a target of -1.
+    """
+
+    def __init__(self, world: jug.WaterJugWorld):
+        self.world = world
+        self.width = len(jug.ACTIONS)
+        self.state_count = world.boundary_count()
+        self.reverse = None
+        if numpy is None:
+            self.targets, self.costs = self.build_python()
+        else:
+            self.targets, self.costs = self.build_numpy()
+
+    def build_numpy(self):
+        """Return the flat target and cost arrays, computed column by column with NumPy."""
+        # Variables
+        a_max = self.world.a_max
+        b_max = self.world.b_max
+        a, b = self.boundary_volumes_numpy()
+        full_a = numpy.full_like(a, a_max)
+        full_b = numpy.full_like(b, b_max)
+        empty = numpy.zeros_like(a)
+        pour_a = numpy.minimum(a, b_max - b)
+        pour_b = numpy.minimum(b, a_max - a)
+        # Logic
+        # Columns follow the order of ACTIONS: Fill A, Fill B, Pour A, Pour B, Empty A, Empty B
+        litres = numpy.stack([a_max - a, b_max - b, pour_a, pour_b, a, b], axis=1)
+        new_a = numpy.stack([full_a, a, a - pour_a, a + pour_b, empty, a], axis=1)
+        new_b = numpy.stack([b, full_b, b + pour_a, b - pour_b, b, empty], axis=1)
+        multiplier = numpy.array([action_type.value for action_type, _ in jug.ACTIONS], dtype=numpy.int64)
+        # An action is possible exactly when it moves at least one litre
+        possible = litres > 0
+        targets = numpy.where(possible, self.boundary_ids_numpy(new_a, new_b), -1)
+        costs = numpy.where(possible, litres * multiplier, 0)
+        # Plain arrays give much faster scalar access than NumPy in the search loops
+        return self.to_array(targets), self.to_array(costs)
+
+    def boundary_volumes_numpy(self):
+        """Return the volumes of jug A and jug B of every boundary configuration, in ``boundary_id`` order."""
+        a_max = self.world.a_max
+        b_max = self.world.b_max
+        column = numpy.arange(b_max + 1, dtype=numpy.int64)
+        sides = numpy.array([0] if b_max == 0 else [0, b_max], dtype=numpy.int64)
+        middle = numpy.arange(1, max(a_max, 1), dtype=numpy.int64)
+        a = [numpy.zeros_like(column)]
+        b = [column]
+        if a_max > 0:
+            a.append(numpy.full_like(column, a_max))
+            b.append(column)
+        a.append(numpy.repeat(middle, len(sides)))
+        b.append(numpy.tile(sides, len(middle)))
+        return numpy.concatenate(a), numpy.concatenate(b)
+
+    def boundary_ids_numpy(self, a, b):
+        """Return ``WaterJugWorld.boundary_id`` of arrays of volumes which all lie on the boundary."""
+        a_max = self.world.a_max
+        b_max = self.world.b_max
+        middle = 2 * (b_max + 1) + (a - 1) * (1 if b_max == 0 else 2) + (b != 0)
+        return numpy.where(a == 0, b, numpy.where(a == a_max, b_max + 1 + b, middle))
+
+    @staticmethod
+    def to_array(values):
+        """Return a NumPy array of integers as a flat ``array.array``."""
+        result = array.array('q')
+        result.frombytes(numpy.ascontiguousarray(values, dtype=numpy.int64).tobytes())
+        return result
+
+    def build_python(self):
+        """Return the flat target and cost arrays, computed state by state."""
+        targets = array.array('q')
+        costs = array.array('q')
+        for state_id in range(self.state_count):
+            row_targets = [-1] * self.width
+            row_costs = [0] * self.width
+            for kind, target, cost in self.row(self.state(state_id)):
+                row_targets[kind] = target
+                row_costs[kind] = cost
+            targets.extend(row_targets)
+            costs.extend(row_costs)
+        return targets, costs
+
+    def state(self, state_id: int):
+        """Return the ``WaterJugState`` with a given id."""
+        a, b = self.world.boundary_volumes(state_id)
+        return jug.WaterJugState(self.world, a, b)
+
+    def state_id(self, state: jug.WaterJugState):
+        """Return the id of a given ``WaterJugState``, or -1 if neither of its jugs is empty or full."""
+        return self.world.boundary_id(state.a, state.b)
+
+    def row(self, state: jug.WaterJugState):
+        """Return a list of (kind, target id, cost) for every possible action on any ``WaterJugState``."""
+        return [(jug.ACTIONS.index((pair.action.action_type, pair.action.jug)),
+                 self.state_id(pair.state),
+                 pair.action.cost)
+                for pair in state.successor()]
+
+    def successor(self, state_id: int):
+        """Return a list of (kind, target id, cost) for every possible action on the state with a given id."""
+        result = []
+        base = state_id * self.width
+        for kind in range(self.width):
+            target = self.targets[base + kind]
+            if target >= 0:
+                result.append((kind, target, self.costs[base + kind]))
+        return result
+
+    def predecessors(self):
+        """
+        Return the reverse successor graph in compressed form, building it on first use.
+        The predecessors of the state with id ``t`` are the flat entries ``entries[offsets[t]:offsets[t + 1]]``,
+        where each entry is ``source_id * width + kind`` of an action on ``source_id`` leading to ``t``.
+        """
+        if self.reverse is None:
+            if numpy is None:
+                buckets = [[] for _ in range(self.state_count)]
+                for entry, target in enumerate(self.targets):
+                    if target >= 0:
+                        buckets[target].append(entry)
+                offsets = array.array('q', [0])
+                entries = array.array('q')
+                for bucket in buckets:
+                    entries.extend(bucket)
+                    offsets.append(len(entries))
+            else:
+                targets = numpy.frombuffer(self.targets, dtype=numpy.int64)
+                flat = numpy.flatnonzero(targets >= 0)
+                order = numpy.argsort(targets[flat], kind='stable')
+                counts = numpy.bincount(targets[flat], minlength=self.state_count)
+                offsets = self.to_array(numpy.concatenate(([0], numpy.cumsum(counts))))
+                entries = self.to_array(flat[order])
+            self.reverse = offsets, entries
+        return self.reverse
+
+    def action(self, kind: int, cost: int):
+        """Return the shared ``WaterJugAction`` of a given kind with a given cost."""
+        action_type, _ = jug.ACTIONS[kind]
+        return self.world.action(kind, cost // action_type.value)
+
+    def construct_path(self, parents: dict, goal_id: int, start: jug.WaterJugState):
+        """
+        Build a ``Path`` from a given start by following a map of state id -> (parent id, kind, cost)
+        back from a goal state id. The id of the start maps to ``None``.
+        """
+        result = search.Path()
+        state_id = goal_id
+        while parents[state_id] is not None:
+            parent_id, kind, cost = parents[state_id]
+            result.insert(0, search.ActionStatePair(self.action(kind, cost), self.state(state_id)))
+            result.cost += cost
+            state_id = parent_id
+        result.head = start
+        return result
+
+
+@functools.lru_cache(maxsize=8)
+def get_table(world: jug.WaterJugWorld):
+    """Return the ``TransitionTable`` of a given world, building it on first use."""
+    return TransitionTable(world)
+
+
+def empty_path(start: jug.WaterJugState):
+    """Return the ``Path`` of a start which is already the goal."""
+    result = search.Path()
+    result.head = start
+    return result
+
+
+class GoalTable:
+    """
+    Models the optimal cost to a fixed goal, and the next action to take, from every state of a world.
+    It is built by one reverse Uniform-Cost Search from the goal over the predecessors of each state,
+    so the optimal ``Path`` from any start can then be read off in O(plan length).
+    Unreachable states have a cost of -1.
+    """
+
+    def __init__(self, table: TransitionTable, goal_id: int):
+        self.table = table
+        self.goal_id = goal_id
+        self.cost = array.array('q', [-1]) * table.state_count
+        self.next_entry = array.array('q', [-1]) * table.state_count
+        self.sweep()
+
+    def sweep(self):
+        """Run Dijkstra's algorithm backwards from the goal to fill in the cost and next action of every state."""
+        # Variables
+        width = self.table.width
+        costs = self.table.costs
+        offsets, entries = self.table.predecessors()
+        cost = self.cost
+        next_entry = self.next_entry
+        cost[self.goal_id] = 0
+        fringe = [(0, self.goal_id)]
+        # Logic
+        while fringe:
+            state_cost, state_id = heapq.heappop(fringe)
+            if state_cost > cost[state_id]:
+                continue  # Stale entry left behind by a cheaper path
+            for i in range(offsets[state_id], offsets[state_id + 1]):
+                entry = entries[i]
+                source_id = entry // width
+                source_cost = state_cost + costs[entry]
+                last_cost = cost[source_id]
+                if last_cost < 0 or source_cost < last_cost:
+                    cost[source_id] = source_cost
+                    next_entry[source_id] = entry
+                    heapq.heappush(fringe, (source_cost, source_id))
+
+    def path(self, start: jug.WaterJugState):
+        """Return the optimal ``Path`` from a given ``WaterJugState`` to the goal, or ``None`` if there is none."""
+        table = self.table
+        result = empty_path(start)
+        state_id = table.state_id(start)
+        if state_id < 0:
+            # Neither jug is empty or full, so take the cheapest first step onto the boundary
+            best = None
+            for kind, target, cost in table.row(start):
+                if self.cost[target] >= 0 and (best is None or cost + self.cost[target] < best[0]):
+                    best = (cost + self.cost[target], kind, target, cost)
+            if best is None:
+                return None
+            _, kind, state_id, cost = best
+            result.insert(0, search.ActionStatePair(table.action(kind, cost), table.state(state_id)))
+            result.cost += cost
+        elif self.cost[state_id] < 0:
+            return None
+        while state_id != self.goal_id:
+            entry = self.next_entry[state_id]
+            kind = entry % table.width
+            state_id = table.targets[entry]
+            result.insert(len(result.list), search.ActionStatePair(table.action(kind, table.costs[entry]),
+                                                                   table.state(state_id)))
+            result.cost += table.costs[entry]
+        return result
+
+
+@functools.lru_cache(maxsize=32)
+def get_goal_table(world: jug.WaterJugWorld, goal_id: int):
+    """Return the ``GoalTable`` of a given world and goal state id, building it on first use."""
+    return GoalTable(get_table(world), goal_id)
+
+
+def solve_from(start: jug.WaterJugState, goal: jug.WaterJugState):
+    """
+    Return the optimal ``Path`` from a given start to a given goal, or ``None`` if there is no solution,
+    reusing the ``GoalTable`` of the goal across queries with different starts.
+    Above ``PLANNER_THRESHOLD``, the ``Path`` of the closed-form planner is returned instead, which may not be optimal,
+    or ``PlanTooLongException`` is raised if it has more than ``MAX_PLAN_LENGTH`` actions.
+    """
+    if goal.world.boundary_count() > PLANNER_THRESHOLD:
+        return plan_path(start, goal)
+    if start == goal:
+        return empty_path(start)
+    goal_id = get_table(goal.world).state_id(goal)
+    if goal_id < 0:
+        return None  # Only the start itself can have neither jug empty nor full
+    return get_goal_table(goal.world, goal_id).path(start)
+
+
+def plan_path(start: jug.WaterJugState, goal: jug.WaterJugState):
+    """
+    Return the ``Path`` of the closed-form planner, or ``None`` if there is no solution.
+    Raise ``PlanTooLongException`` with the compressed ``Plan`` if it has more than ``MAX_PLAN_LENGTH`` actions,
+    as a path would take time and memory linear in its length.
+    """
+    result = planner.plan(start, goal)
+    if result is None:
+        return None
+    if len(result) > MAX_PLAN_LENGTH:
+        raise PlanTooLongException(result)
+    return result.to_path()
+
+
+def uninformed_search(table: TransitionTable, start: jug.WaterJugState, goal: jug.WaterJugState, depth_first=False):
+    """
+    Search the table with Breadth-First Search, or Depth-First Search if ``depth_first`` is ``True``.
+    Repeated states are dropped on generation, as in ``WaterJugSearchProblemBFS``,
+    while ``depth_first_search()`` only drops them when they are popped, as in ``WaterJugSearchProblemDFS``.
+    Return the path, or ``None`` if there is no solution, and the number of nodes visited.
+    """
+    if depth_first:
+        return depth_first_search(table, start, goal)
+    # Variables
+    targets = table.targets
+    costs = table.costs
+    width = table.width
+    start_id = table.state_id(start)
+    goal_id = table.state_id(goal)
+    parents = {start_id: None}
+    fringe = deque()
+    node_visited = 1
+    # Logic
+    if start == goal:
+        return empty_path(start), node_visited
+    if goal_id < 0:
+        return None, node_visited  # Only the start itself can have neither jug empty nor full
+    if start_id < 0:
+        # Expand a start with neither jug empty nor full on its own
+        for kind, target, cost in table.row(start):
+            if target not in parents:
+                parents[target] = (start_id, kind, cost)
+                fringe.append(target)
+                node_visited += 1
+    else:
+        fringe.append(start_id)
+    while fringe:
+        state_id = fringe.popleft()
+        if state_id == goal_id:
+            return table.construct_path(parents, state_id, start), node_visited
+        base = state_id * width
+        for kind in range(width):
+            target = targets[base + kind]
+            if target >= 0 and target not in parents:
+                parents[target] = (state_id, kind, costs[base + kind])
+                fringe.append(target)
+                node_visited += 1
+    return None, node_visited
+
+
+def depth_first_search(table: TransitionTable, start: jug.WaterJugState, goal: jug.WaterJugState):
+    """
+    Search the table with Depth-First Search. As in ``SearchProblem.searchSteps()`` without ``filterOnGeneration``,
+    every child is pushed and a repeated state is only dropped when it is popped,
+    so the path is the one ``WaterJugSearchProblemDFS`` finds.
+    Return the path, or ``None`` if there is no solution, and the number of nodes visited.
+    """
+    # Variables
+    targets = table.targets
+    costs = table.costs
+    width = table.width
+    start_id = table.state_id(start)
+    goal_id = table.state_id(goal)
+    parents = {}  # State id of every expanded node -> (parent id, kind, cost), or None for the start
+    fringe = [(start_id, None)]  # (state id, (parent id, kind, cost)) of every node, as a stack
+    node_visited = 1
+    # Logic
+    if start == goal:
+        return empty_path(start), node_visited
+    if goal_id < 0:
+        return None, node_visited  # Only the start itself can have neither jug empty nor full
+    while fringe:
+        state_id, parent = fringe.pop()
+        if state_id == goal_id:
+            parents[state_id] = parent
+            return table.construct_path(parents, state_id, start), node_visited
+        if state_id in parents:
+            continue  # Already expanded
+        parents[state_id] = parent
+        if state_id < 0:
+            row = table.row(start)  # A start with neither jug empty nor full
+        else:
+            base = state_id * width
+            row = [(kind, targets[base + kind], costs[base + kind]) for kind in range(width)]
+        for kind, target, cost in row:
+            if target >= 0:
+                fringe.append((target, (state_id, kind, cost)))
+                node_visited += 1
+    return None, node_visited
+
+
+def best_first_search(table: TransitionTable, start: jug.WaterJugState, goal: jug.WaterJugState,
+                      heuristic, cost_weight=1):
+    """
+    Search the table with Best-First Search on f(n) = ``cost_weight`` * g(n) + h(n),
+    i.e. A* Search for a weight of 1 and Greedy Best-First Search for a weight of 0.
+    ``heuristic`` maps a ``WaterJugState`` to h(n). Ties are broken on the higher g(n), then the most recent node,
+    as in ``informed.HeapFringe``. A node reached again by a cheaper path is re-queued.
+    Return the path, or ``None`` if there is no solution, and the number of nodes visited.
+    """
+    # Variables
+    targets = table.targets
+    costs = table.costs
+    width = table.width
+    start_id = table.state_id(start)
+    goal_id = table.state_id(goal)
+    parents = {start_id: None}
+    g = {start_id: 0}
+    h = {start_id: heuristic(start)}
+    counter = 0
+    fringe = [(h[start_id], 0, 0, start_id)]
+    node_visited = 1
+    # Logic
+    if start == goal:
+        return empty_path(start), node_visited
+    if goal_id < 0:
+        return None, node_visited  # Only the start itself can have neither jug empty nor full
+    while fringe:
+        _, negative_cost, _, state_id = heapq.heappop(fringe)
+        if -negative_cost != g[state_id]:
+            continue  # Stale entry left behind by a cheaper path
+        if state_id == goal_id:
+            return table.construct_path(parents, state_id, start), node_visited
+        state_cost = g[state_id]
+        if state_id < 0:
+            row = table.row(start)  # A start with neither jug empty nor full is only expanded once
+        else:
+            base = state_id * width
+            row = [(kind, targets[base + kind], costs[base + kind]) for kind in range(width)]
+        for kind, target, action_cost in row:
+            if target < 0:
+                continue
+            node_visited += 1
+            cost = state_cost + action_cost
+            last_cost = g.get(target)
+            if last_cost is None:
+                h[target] = heuristic(table.state(target))
+            elif last_cost <= cost:
+                continue
+            g[target] = cost
+            parents[target] = (state_id, kind, action_cost)
+            counter -= 1
+            heapq.heappush(fringe, (cost_weight * cost + h[target], -cost, counter, target))
+    return None, node_visited
+
+
+def solve(problem):
+    """
+    Solve one of the ``WaterJugSearchProblem`` classes over the transition table of its world.
+    Set ``nodeVisited`` on the problem and return the solution as a ``Path``, or ``None`` if there is no solution.
+    An unreachable goal is rejected before the table is built, with the reason kept in ``rejection``.
+    Above ``PLANNER_THRESHOLD``, the ``Path`` of the closed-form planner is returned instead, without visiting nodes,
+    or ``PlanTooLongException`` is raised if it has more than ``MAX_PLAN_LENGTH`` actions.
+    """
+    problem.rejection = jug.unsolvable_reason(problem.start, problem.goal)
+    if problem.rejection is not None:
+        return None
+    if problem.start.world.boundary_count() > PLANNER_THRESHOLD:
+        return plan_path(problem.start, problem.goal)
+    table = get_table(problem.start.world)
+    if isinstance(problem, informed.BestFirstSearchProblem):
+        cost_weight = 1 if isinstance(problem, jug.AStarSearchProblem) else 0
+        path, node_visited = best_first_search(table, problem.start, problem.goal, problem.heuristic, cost_weight)
+    else:
+        depth_first = problem.fringeClass is search.StackFringe
+        path, node_visited = uninformed_search(table, problem.start, problem.goal, depth_first)
+    problem.nodeVisited = node_visited
+    return path
@@ -3,9 +3,12 @@ Water Jug Problem Solver
 Author: Adam Weir
 """
 
+import asyncio
 import cm3038.search as search
 import cm3038.informed.search as informed
 import enum
+import itertools
+import math
 
 
 class ActionType(enum.Enum):
@@ -31,27 +34,100 @@ class Jug(enum.Enum):
 def other_jug(jug: Jug):
     """Given one ``Jug``, return the other."""
 
-    return {
-        Jug.A: Jug.B,
-        Jug.B: Jug.A
-    }[jug]
+    return Jug.B if jug is Jug.A else Jug.A
+
+
+# Every (ActionType, Jug) combination, in the order ``WaterJugState.successor`` generates them
+ACTIONS = tuple((action_type, jug) for action_type in ActionType for jug in Jug)
+FILL_A, FILL_B, POUR_A, POUR_B, EMPTY_A, EMPTY_B = range(len(ACTIONS))
 
 
 class WaterJugWorld:
     """Models the problem's constants, in this case the capacities of the jugs."""
 
+    __slots__ = ('a_max', 'b_max', 'actions')
+
     def __init__(self, a_max: int, b_max: int):
         self.a_max = a_max
         self.b_max = b_max
+        self.actions = {}
+
+    def __eq__(self, other):
+        if not isinstance(other, WaterJugWorld):
+            return False
+        return self is other or (self.a_max == other.a_max and self.b_max == other.b_max)
+
+    def __hash__(self):
+        return hash((self.a_max, self.b_max))
+
+    def state_id(self, a: int, b: int):
+        """Return the unique integer id of the configuration with volumes ``a`` and ``b``, in the range 0 to
+        ``state_count() - 1``."""
+        return a * (self.b_max + 1) + b
+
+    def state_count(self):
+        """Return the number of configurations in this world, i.e. (a_max + 1) * (b_max + 1)."""
+        return (self.a_max + 1) * (self.b_max + 1)
+
+    def boundary_count(self):
+        """
+        Return the number of configurations with at least one jug empty or full.
+        Apart from the start, every configuration reachable by fill, pour and empty is one of these,
+        so there are only O(a_max + b_max) of them.
+        """
+        rows = 1 if self.a_max == 0 else 2
+        columns = 1 if self.b_max == 0 else 2
+        return rows * (self.b_max + 1) + columns * max(self.a_max - 1, 0)
+
+    def boundary_id(self, a: int, b: int):
+        """
+        Return the index of the configuration with volumes ``a`` and ``b`` among the ``boundary_count()``
+        configurations with a jug empty or full, or -1 if neither jug is empty or full.
+        Indices run along a = 0, then a = a_max, then b = 0 and b = b_max in turn for each 0 < a < a_max.
+        """
+        if a == 0:
+            return b
+        if a == self.a_max:
+            return self.b_max + 1 + b
+        if b == 0:
+            return 2 * (self.b_max + 1) + (a - 1) * (1 if self.b_max == 0 else 2)
+        if b == self.b_max:
+            return 2 * (self.b_max + 1) + (a - 1) * 2 + 1
+        return -1
+
+    def boundary_volumes(self, boundary_id: int):
+        """Return the volumes (a, b) of the configuration with a given ``boundary_id``."""
+        column = self.b_max + 1
+        if boundary_id < column:
+            return 0, boundary_id
+        if boundary_id < 2 * column:
+            return self.a_max, boundary_id - column
+        columns = 1 if self.b_max == 0 else 2
+        a, side = divmod(boundary_id - 2 * column, columns)
+        return a + 1, self.b_max if side else 0
+
+    def action(self, kind: int, litres: int):
+        """
+        Return the shared ``WaterJugAction`` for a given index into ``ACTIONS`` which moves a given number of litres.
+        Actions are immutable once created, so one instance per (ActionType, Jug, cost) is reused by every state.
+        """
+        key = litres * len(ACTIONS) + kind
+        action = self.actions.get(key)
+        if action is None:
+            action_type, jug = ACTIONS[kind]
+            action = WaterJugAction(action_type, jug, litres * action_type.value)
+            self.actions[key] = action
+        return action
 
 
 class WaterJugAction(search.Action):
     """Models an ``Action`` in terms of its ``ActionType`` and which ``Jug`` to apply it to."""
 
-    def __init__(self, action_type: ActionType, jug: Jug):
+    def __init__(self, action_type: ActionType, jug: Jug, cost=1.0):
         super().__init__()
         self.action_type = action_type
         self.jug = jug
+        self.cost = cost
 
     def __str__(self):
         return {
@@ -62,12 +138,18 @@ class WaterJugAction(search.Action):
 
 
 class WaterJugState(search.State):
-    """Models a ``State`` in terms of the volumes of the jugs."""
+    """
+    Models a ``State`` in terms of the volumes of the jugs.
+    ``id`` packs both volumes into one integer, which is unique within a ``WaterJugWorld`` and used as the hash.
+    """
+
+    __slots__ = ('world', 'a', 'b', 'id')
 
     def __init__(self, world: WaterJugWorld, a: int, b: int):
         self.world = world
         self.a = a
         self.b = b
+        self.id = a * (world.b_max + 1) + b
 
     def __str__(self):
         return "Jug A: {}/{}l \n" \
@@ -77,10 +159,10 @@ class WaterJugState(search.State):
     def __eq__(self, other):
         if not isinstance(other, WaterJugState):
             return False
-        return self.a == other.a and self.b == other.b
+        return self.id == other.id and self.world == other.world
 
     def __hash__(self):
-        return self.a + self.b * 100
+        return self.id
 
     def apply_action(self, action: WaterJugAction):
         """Return the result of a given ``WaterJugAction`` on this ``WaterJugState``."""
@@ -88,63 +170,117 @@ class WaterJugState(search.State):
         jug = action.jug
         action_type = action.action_type
         # Logic
-        a, b = {
-            ActionType.FILL: self.fill_result(jug),
-            ActionType.POUR: self.pour_result(jug),
-            ActionType.EMPTY: self.empty_result(jug)
-        }[action_type]
+        # Only the result of the given ActionType is computed
+        if action_type == ActionType.FILL:
+            a, b = self.fill_result(jug)
+        elif action_type == ActionType.POUR:
+            a, b = self.pour_result(jug)
+        else:
+            a, b = self.empty_result(jug)
         return WaterJugState(self.world, a, b)
 
     def successor(self):
         """Return a list of ``ActionStatePair``,
-         representing every possible ``WaterJugAction`` that can be performed on this ``WaterJugState``."""
+         representing every possible ``WaterJugAction`` that can be performed on this ``WaterJugState``.
+         Only possible transitions are computed, and their costs are computed inline.
+         The order is the same as ``ACTIONS``, i.e. Fill A, Fill B, Pour A, Pour B, Empty A, Empty B."""
+        # Variables
+        world = self.world
+        action = world.action
+        a = self.a
+        b = self.b
+        a_max = world.a_max
+        b_max = world.b_max
+        result = []
+        # Logic
+        # If a jug is full, you can't fill it
+        if a < a_max:
+            result.append(search.ActionStatePair(action(FILL_A, a_max - a), WaterJugState(world, a_max, b)))
+        if b < b_max:
+            result.append(search.ActionStatePair(action(FILL_B, b_max - b), WaterJugState(world, a, b_max)))
+        # If the pouring jug is empty or the receiving jug is full, you can't pour
+        if a > 0 and b < b_max:
+            litres = min(a, b_max - b)
+            result.append(search.ActionStatePair(action(POUR_A, litres), WaterJugState(world, a - litres, b + litres)))
+        if b > 0 and a < a_max:
+            litres = min(b, a_max - a)
+            result.append(search.ActionStatePair(action(POUR_B, litres), WaterJugState(world, a + litres, b - litres)))
+        # If a jug is empty, you can't empty it
+        if a > 0:
+            result.append(search.ActionStatePair(action(EMPTY_A, a), WaterJugState(world, 0, b)))
+        if b > 0:
+            result.append(search.ActionStatePair(action(EMPTY_B, b), WaterJugState(world, a, 0)))
+        return result
+
+    def predecessor(self):
+        """Return a list of ``ActionStatePair``,
+         representing every ``WaterJugState`` with a jug empty or full and the ``WaterJugAction`` which leads from it
+         to this ``WaterJugState``. Every successor of any state has a jug empty or full, so apart from a start
+         with neither, these are the only states a search can reach this one from.
+         This is consistent with ``successor()``, so a fill leads to a full jug, an empty to an empty jug,
+         and a pour either empties the pouring jug or fills the receiving jug.
+         Only a state with both jugs empty or full has O(a_max + b_max) predecessors, any other has at most 6."""
+        # Variables
+        world = self.world
+        action = world.action
+        a = self.a
+        b = self.b
+        a_max = world.a_max
+        b_max = world.b_max
+        b_edge = b == 0 or b == b_max  # Whether jug B alone puts a state with any volume in jug A on the boundary
+        a_edge = a == 0 or a == a_max
         result = []
-        # Iterate over all Actions
-        # If Action is possible, find its cost & add to result list
-        for action_type in ActionType:
-            for jug in Jug:
-                action = WaterJugAction(action_type, jug)
-                if self.is_possible(action):
-                    action.cost = self.action_cost(action)
-                    result.append(search.ActionStatePair(action, self.apply_action(action)))
+        # Logic
+        # A jug can only have been filled if it is full, and from empty unless the other jug is empty or full
+        if a == a_max:
+            for x in (range(a_max) if b_edge else range(min(a_max, 1))):
+                result.append(search.ActionStatePair(action(FILL_A, a_max - x), WaterJugState(world, x, b)))
+        if b == b_max:
+            for y in (range(b_max) if a_edge else range(min(b_max, 1))):
+                result.append(search.ActionStatePair(action(FILL_B, b_max - y), WaterJugState(world, a, y)))
+        # A pour can only have happened if the pouring jug is empty or the receiving jug is full,
+        # and only from a full pouring jug or an empty receiving jug
+        if a == 0 or b == b_max:
+            for litres in sorted({a_max - a, b}):
+                if 1 <= litres <= min(a_max - a, b):
+                    result.append(search.ActionStatePair(action(POUR_A, litres),
+                                                         WaterJugState(world, a + litres, b - litres)))
+        if b == 0 or a == a_max:
+            for litres in sorted({b_max - b, a}):
+                if 1 <= litres <= min(b_max - b, a):
+                    result.append(search.ActionStatePair(action(POUR_B, litres),
+                                                         WaterJugState(world, a - litres, b + litres)))
+        # A jug can only have been emptied if it is empty, and from full unless the other jug is empty or full
+        if a == 0:
+            for x in (range(1, a_max + 1) if b_edge else range(a_max, a_max + 1) if a_max > 0 else ()):
+                result.append(search.ActionStatePair(action(EMPTY_A, x), WaterJugState(world, x, b)))
+        if b == 0:
+            for y in (range(1, b_max + 1) if a_edge else range(b_max, b_max + 1) if b_max > 0 else ()):
+                result.append(search.ActionStatePair(action(EMPTY_B, y), WaterJugState(world, a, y)))
         return result
 
     def get_volume(self, jug: Jug):
         """Return the volume of a given ``Jug``."""
-        return {
-            Jug.A: self.a,
-            Jug.B: self.b
-        }[jug]
+        return self.a if jug is Jug.A else self.b
 
     def get_capacity(self, jug: Jug):
         """Return the capacity of a given ``Jug``."""
-        return {
-            Jug.A: self.world.a_max,
-            Jug.B: self.world.b_max
-        }[jug]
+        return self.world.a_max if jug is Jug.A else self.world.b_max
 
     def is_full(self, jug: Jug):
         """Return ``True`` if a given ``Jug`` is full."""
-        return {
-            Jug.A: (self.a == self.world.a_max),
-            Jug.B: (self.b == self.world.b_max)
-        }[jug]
+        return self.get_volume(jug) == self.get_capacity(jug)
 
     def is_empty(self, jug: Jug):
         """Return ``True`` if a given ``Jug`` is empty."""
-        return {
-            Jug.A: (self.a == 0),
-            Jug.B: (self.b == 0)
-        }[jug]
+        return self.get_volume(jug) == 0
 
     def set_volume_result(self, jug: Jug, volume: int):
         """Return the volumes of both jugs after setting a given ``Jug`` to a given ``volume``."""
         if volume <= self.get_capacity(jug):
-            a, b = {
-                Jug.A: (volume, self.b),
-                Jug.B: (self.a, volume)
-            }[jug]
-            return a, b
+            if jug is Jug.A:
+                return volume, self.b
+            return self.a, volume
 
     def fill_result(self, jug: Jug):
         """Return the volumes of both jugs after filling a given ``Jug``."""
@@ -161,18 +297,14 @@ class WaterJugState(search.State):
         # If the jug can be emptied into the other without overflowing:
         if volume + other_volume <= other_capacity:
             # Pouring jug = 0. Receiving jug = volume of this jug + volume of the other
-            a, b = {
-                Jug.A: (0, volume + other_volume),
-                Jug.B: (volume + other_volume, 0)
-            }[jug]
+            volume, other_volume = 0, volume + other_volume
         # If the jug cannot be emptied into the other without overflowing:
         else:
             # Pouring jug = its volume - the remaining capacity of the other. Receiving jug = its capacity
-            a, b = {
-                Jug.A: (volume - (other_capacity - other_volume), other_capacity),
-                Jug.B: (other_capacity, volume - (other_capacity - other_volume))
-            }[jug]
-        return a, b
+            volume, other_volume = volume - (other_capacity - other_volume), other_capacity
+        if jug is Jug.A:
+            return volume, other_volume
+        return other_volume, volume
 
     def empty_result(self, jug: Jug):
         """Return the volumes of both jugs after emptying a given jug."""
@@ -184,15 +316,15 @@ class WaterJugState(search.State):
         action_type = action.action_type
         jug = action.jug
         # Logic
-        return {
-            # If this jug is full, you can't fill it
-            ActionType.FILL: not self.is_full(jug),
-            # If this jug is empty, you can't pour from it
-            # If the other jug is full, you can't pour into it
-            ActionType.POUR: not self.is_empty(jug) and not self.is_full(other_jug(jug)),
-            # If this jug is empty, you can't empty it
-            ActionType.EMPTY: not self.is_empty(action.jug)
-        }[action_type]
+        # If this jug is full, you can't fill it
+        if action_type == ActionType.FILL:
+            return not self.is_full(jug)
+        # If this jug is empty, you can't pour from it
+        # If the other jug is full, you can't pour into it
+        if action_type == ActionType.POUR:
+            return not self.is_empty(jug) and not self.is_full(other_jug(jug))
+        # If this jug is empty, you can't empty it
+        return not self.is_empty(jug)
 
     def action_cost(self, action: WaterJugAction):
         """Return the cost of a given ``WaterJugAction`` if performed on this ``WaterJugState``."""
@@ -220,12 +352,172 @@ class WaterJugState(search.State):
         return litres * multiplier
 
 
-class WaterJugSearchProblemBFS(search.SearchProblem):
+def unsolvable_reason(start: WaterJugState, goal: WaterJugState):
+    """
+    Return why a given goal ``WaterJugState`` can't be reached from a given start, or ``None`` if it can.
+    This takes O(log capacity) time instead of exhausting the reachable states:
+    - Every configuration reachable from the start, other than the start itself, has a jug empty or full.
+    - Fill and empty set a jug to a multiple of gcd(a_max, b_max) and pour keeps the total volume,
+      so the total modulo the gcd can only be 0, or that of a, b or a + b at the start.
+    Every configuration on the boundary with one of those totals is reachable.
+    """
+    # Variables
+    a_max = start.world.a_max
+    b_max = start.world.b_max
+    # Logic
+    if goal == start:
+        return None
+    if not (0 <= goal.a <= a_max and 0 <= goal.b <= b_max):
+        return "The goal volumes exceed the jug capacities."
+    if 0 < goal.a < a_max and 0 < goal.b < b_max:
+        return "Neither jug is empty or full in the goal, " \
+               "but every configuration reachable from the start has one jug empty or full."
+    # The gcd is > 0 here, as a world with 2 jugs of capacity 0 has a single configuration
+    gcd = math.gcd(a_max, b_max)
+    residues = sorted({0, start.a % gcd, start.b % gcd, (start.a + start.b) % gcd})
+    total = goal.a + goal.b
+    if total % gcd not in residues:
+        return "The goal holds {}l in total, which is {} modulo gcd({}, {}) = {}, " \
+               "but only totals which are {} modulo {} are reachable from the start.".format(
+                   total, total % gcd, a_max, b_max, gcd, " or ".join(str(r) for r in residues), gcd)
+    return None
+
+
+def start_predecessors(start: WaterJugState, state: WaterJugState):
+    """
+    Return the predecessors of a given ``WaterJugState`` which a search from a given start can reach:
+    those of ``WaterJugState.predecessor()``, plus the start itself if neither of its jugs is empty or full
+    and one of its at most 6 actions leads to the state.
+    """
+    result = state.predecessor()
+    if start.world.boundary_id(start.a, start.b) < 0:
+        result += [search.ActionStatePair(pair.action, start) for pair in start.successor() if pair.state == state]
+    return result
+
+
+class SolvabilityCheck:
+    """
+    Mixin for the ``WaterJugSearchProblem`` classes which rejects an unreachable goal before searching.
+    The reason for the rejection is kept in ``rejection``.
+    """
+
+    rejection = None
+
+    def searchSteps(self):
+        self.rejection = unsolvable_reason(self.start, self.goal)
+        if self.rejection is not None:
+            return None
+        return (yield from super().searchSteps())
+
+    def anytime_search(self, *args, **kwargs):
+        """As ``search()``, but for the anytime search of an ``AStarSearchProblem``, which yields no path if rejected."""
+        self.rejection = unsolvable_reason(self.start, self.goal)
+        if self.rejection is not None:
+            return iter(())
+        return super().anytime_search(*args, **kwargs)
+
+
+class PathCacheCheck:
+    """
+    Mixin for the ``WaterJugSearchProblem`` classes which, given a ``path_cache``, such as a ``pathCache.PathCache``,
+    returns a solution found before without searching, in which case ``cache_hit`` is ``True``,
+    and adds every solution found within the limits to it.
+    It comes after ``SolvabilityCheck``, so an unreachable goal is rejected without consulting the cache.
+    """
+
+    path_cache = None
+    cache_hit = False
+
+    def searchSteps(self):
+        cache = self.path_cache
+        if cache is not None:
+            result = cache.get(self.start, self.goal, self.cache_name())
+            self.cache_hit = result is not None
+            if self.cache_hit:
+                return result
+        result = yield from super().searchSteps()
+        if cache is not None and result is not None and self.limit is None:
+            cache.put(self.start, self.goal, self.cache_name(), result)
+        return result
+
+    async def searchAsync(self):
+        """As ``searchAsync()``, but the cache is read and written in the default thread pool of the event loop,
+        as a ``PathCache`` blocks on its file."""
+        cache = self.path_cache
+        if cache is None or unsolvable_reason(self.start, self.goal) is not None:
+            return await super().searchAsync()
+        loop = asyncio.get_running_loop()
+        name = self.cache_name()
+        result = await loop.run_in_executor(None, cache.get, self.start, self.goal, name)
+        self.cache_hit = result is not None
+        if self.cache_hit:
+            return result
+        self.path_cache = None  # Hidden from searchSteps on this problem only
+        try:
+            result = await super().searchAsync()
+        finally:
+            self.path_cache = cache
+        if result is not None and self.limit is None:
+            await loop.run_in_executor(None, cache.put, self.start, self.goal, name, result)
+        return result
+
+    def cache_name(self):
+        """Return the name of the algorithm which solutions of this problem are cached under."""
+        return type(self).__name__
+
+
+class TableHeuristic:
+    """
+    Mixin for the informed ``WaterJugSearchProblem`` classes which looks h(n) up in a table of the goal
+    instead of computing the 'Markings' heuristic, given ``heuristic_tables``, such as a
+    ``heuristicTable.HeuristicTables``. The table is only looked up, and built if need be, when the search starts,
+    and is kept in ``heuristic_table``, which is ``None`` until then or if the world is too large for a table.
+    It comes after ``SolvabilityCheck`` and ``PathCacheCheck``, so no table is built for an unreachable goal
+    or a solution found in the cache.
+    """
+
+    heuristic_tables = None
+    heuristic_table = None
+
+    def find_table(self):
+        """Return the ``heuristic_table``, looking it up in ``heuristic_tables`` on first use."""
+        if self.heuristic_table is None and self.heuristic_tables is not None:
+            self.heuristic_table = self.heuristic_tables.get(self.goal)
+        return self.heuristic_table
+
+    def searchSteps(self):
+        self.find_table()
+        return (yield from super().searchSteps())
+
+    async def searchAsync(self):
+        """As ``searchAsync()``, but the table is built in the default thread pool of the event loop,
+        as building it may take a while."""
+        if self.heuristic_tables is not None and unsolvable_reason(self.start, self.goal) is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.find_table)
+        return await super().searchAsync()
+
+    def anytime_search(self, *args, **kwargs):
+        self.find_table()
+        return super().anytime_search(*args, **kwargs)
+
+    def table_name(self):
+        """
+        Return the suffix of the cache name of a problem which uses a table, as a table may lead a search to a different
+        path, or an empty string. It only depends on ``heuristic_tables``, so a cache hit never builds the table.
+        """
+        tables = self.heuristic_tables
+        return "(table)" if tables is not None and tables.covers(self.goal) else ""
+
+
+class WaterJugSearchProblemBFS(SolvabilityCheck, PathCacheCheck, search.SearchProblem):
     """
     A domain-dependent uninformed SearchProblem for the Water Jug Problem.
     This implementation uses Breadth-First Search.
     """
 
+    fringeClass = search.QueueFringe
+    filterOnGeneration = True
+
     def __init__(self, start: WaterJugState, goal: WaterJugState):
         super().__init__(start)
         self.start = start
@@ -248,12 +540,14 @@ class WaterJugSearchProblemBFS(search.SearchProblem):
         return state == self.goal
 
 
-class WaterJugSearchProblemDFS(search.SearchProblem):
+class WaterJugSearchProblemDFS(SolvabilityCheck, PathCacheCheck, search.SearchProblem):
     """
     A domain-dependent uninformed SearchProblem for the Water Jug Problem.
-    This implementation uses Breadth-First Search.
+    This implementation uses Depth-First Search.
     """
 
+    fringeClass = search.StackFringe
+
     def __init__(self, start: WaterJugState, goal: WaterJugState):
         super().__init__(start)
         self.start = start
@@ -275,8 +569,84 @@ class WaterJugSearchProblemDFS(search.SearchProblem):
     def isGoal(self, state: WaterJugState):
         return state == self.goal
 
-    def addChild(self, fringe, childNode):
-        fringe.insert(0, childNode)
+
+class WaterJugSearchProblemIDDFS(WaterJugSearchProblemDFS):
+    """
+    A domain-dependent uninformed SearchProblem for the Water Jug Problem.
+    This implementation uses Iterative-Deepening Depth-First Search, so the path found has the fewest actions
+    and memory grows with the depth of the solution only, plus a transposition table of at most
+    ``transpositionLimit`` states. Set it to 0 to keep only the current path.
+    """
+
+    iterativeDeepening = True
+    transpositionLimit = 65536
+
+
+class WaterJugSearchProblemBidirectional(SolvabilityCheck, PathCacheCheck, search.BidirectionalSearchProblem):
+    """
+    A domain-dependent uninformed SearchProblem for the Water Jug Problem.
+    This implementation uses Bidirectional Breadth-First Search.
+    """
+
+    def __init__(self, start: WaterJugState, goal: WaterJugState):
+        super().__init__(start, goal)
+        self.start = start
+        self.goal = goal
+
+    def __str__(self):
+        start_a = self.start.a
+        start_b = self.start.b
+        goal_a = self.goal.a
+        goal_b = self.goal.b
+        a_max = self.start.world.a_max
+        b_max = self.start.world.b_max
+        return "Problem: \n" \
+               "Jug A: {}/{}l, Jug B: {}/{}l -> Jug A: {}/{}l, Jug B: {}/{}l \n".format(start_a, a_max,
+                                                                                        start_b, b_max,
+                                                                                        goal_a, a_max,
+                                                                                        goal_b, b_max)
+
+    def isGoal(self, state: WaterJugState):
+        return state == self.goal
+
+    def predecessors(self, state: WaterJugState):
+        """Return the predecessors of a given ``WaterJugState``, i.e. those with a jug empty or full,
+        and the start if neither of its jugs is, as no action leads to any other state."""
+        return start_predecessors(self.start, state)
+
+
+class WaterJugSearchProblemBidirectionalUCS(SolvabilityCheck, PathCacheCheck,
+                                            search.BidirectionalUniformCostSearchProblem):
+    """
+    A domain-dependent uninformed SearchProblem for the Water Jug Problem.
+    This implementation uses Bidirectional Uniform-Cost Search, so the path found is the cheapest.
+    """
+
+    def __init__(self, start: WaterJugState, goal: WaterJugState):
+        super().__init__(start, goal)
+        self.start = start
+        self.goal = goal
+
+    def __str__(self):
+        start_a = self.start.a
+        start_b = self.start.b
+        goal_a = self.goal.a
+        goal_b = self.goal.b
+        a_max = self.start.world.a_max
+        b_max = self.start.world.b_max
+        return "Problem: \n" \
+               "Jug A: {}/{}l, Jug B: {}/{}l -> Jug A: {}/{}l, Jug B: {}/{}l \n".format(start_a, a_max,
+                                                                                        start_b, b_max,
+                                                                                        goal_a, a_max,
+                                                                                        goal_b, b_max)
+
+    def isGoal(self, state: WaterJugState):
+        return state == self.goal
+
+    def predecessors(self, state: WaterJugState):
+        """Return the predecessors of a given ``WaterJugState``, i.e. those with a jug empty or full,
+        and the start if neither of its jugs is, as no action leads to any other state."""
+        return start_predecessors(self.start, state)
 
 
 class GBFSearchProblem(informed.BestFirstSearchProblem):
@@ -287,8 +657,8 @@ class GBFSearchProblem(informed.BestFirstSearchProblem):
         super().__init__(start, goal)
 
     def evaluation(self, node):
-        """Return the result of the A* evaluation function f(n) = g(n) + h(n)."""
-        return self.heuristic(node.state)
+        """Return the result of the Greedy Best-First Search evaluation function f(n) = h(n)."""
+        return self.nodeHeuristic(node)
 
     def heuristic(self, state):
         """Return the result of the heuristic function h(n)."""
@@ -297,21 +667,121 @@ class GBFSearchProblem(informed.BestFirstSearchProblem):
 
 class AStarSearchProblem(informed.BestFirstSearchProblem):
     """A domain-independent informed SearchProblem.
-    This abstract class uses A* Search."""
+    This abstract class uses A* Search.
+    With a ``weight`` w above 1 it uses Weighted A* Search, which finds a path faster
+    but only guarantees its cost is at most w times the optimal cost."""
+
+    # Weight w of the heuristic in f(n) = g(n) + w * h(n)
+    weight = 1.0
 
     def __init__(self, start, goal):
         super().__init__(start, goal)
 
     def evaluation(self, node):
-        """Return the result of the A* evaluation function f(n) = g(n) + h(n)."""
-        return node.getCost() + self.heuristic(node.state)
+        """Return the result of the A* evaluation function f(n) = g(n) + w * h(n)."""
+        return node.getCost() + self.weight * self.nodeHeuristic(node)
 
     def heuristic(self, state):
         """Return the result of the heuristic function h(n)."""
         pass
 
-
-class WaterJugSearchProblemGBF(GBFSearchProblem):
+    def frontierScore(self, node):
+        """Return h(n), so the node left in the fringe closest to the goal is the most promising when a limit is hit."""
+        return self.nodeHeuristic(node)
+
+    def anytime_search(self, weights=(3.0, 2.0, 1.5, 1.25, 1.0)):
+        """
+        Search with Anytime Repairing A* (ARA*), yielding the best ``Path`` after each pass as a tuple (path, bound),
+        where the cost of the path is at most ``bound`` times the optimal cost.
+        Each pass is a Weighted A* Search with the next of the decreasing ``weights``,
+        which reuses the nodes of the previous passes and only re-expands those whose g(n) has since dropped.
+        The consumer can stop at any time, and the search stops once the path is known to be optimal.
+        Each expansion is checked against the limits, as in ``search()``. Once a limit is hit, the best ``Path``
+        found so far is yielded a last time, with the bound of the nodes left, and the search stops.
+        """
+        visited = {}  # State to its only Node
+        closed = set()  # Nodes expanded in this pass
+        inconsistent = {}  # Nodes whose g(n) dropped after they were expanded in this pass, as an ordered set
+        goals = []  # Nodes of goal states
+        self.startBudget()
+        root = search.Node(self.startState, None, None)
+        visited[root.state] = root
+        self.nodeVisited += 1
+        if self.isGoal(root.state):
+            goals.append(root)
+        self.weight = weights[0]
+        fringe = self.createFringe()
+        fringe.add(root)
+        for weight in weights:
+            # Start a pass with the new weight over the nodes left open and those which became inconsistent
+            if weight != self.weight:
+                self.weight = weight
+                waiting = list(fringe) + list(inconsistent)
+                fringe = self.createFringe()
+                for node in waiting:
+                    node.value = None  # f(n) changes with the weight
+                    fringe.add(node)
+                inconsistent = {}
+                closed = set()
+            self.improve_path(fringe, visited, closed, inconsistent, goals)
+            if not goals:
+                return  # The whole space is searched without a goal, or a limit is hit before one is found
+            goal = min(goals, key=search.Node.getCost)
+            # The optimal cost is at least the lowest g(n) + h(n) of the nodes which may still improve the path
+            lowest = min([goal.getCost()] + [node.getCost() + self.nodeHeuristic(node)
+                                             for node in list(fringe) + list(inconsistent)])
+            bound = goal.getCost() / lowest if lowest > 0 else 1.0
+            if self.limit is None:
+                bound = min(weight, bound)  # Only a finished pass guarantees its weight
+            yield self.constructPath(goal), bound
+            if bound <= 1.0 or self.limit is not None:
+                return
+
+    def improve_path(self, fringe, visited, closed, inconsistent, goals):
+        """Expand nodes in f(n) order until none can lead to a cheaper goal than the best found so far,
+        or a limit is hit, in which case ``limit`` and ``bestNode`` are set."""
+        observer = self.observer
+        while len(fringe) > 0:
+            node = fringe.pop()
+            if goals and self.nodeValue(node) >= min(goal.getCost() for goal in goals):
+                fringe.add(node)  # Leave it for the next pass
+                return
+            if self.overBudget(len(fringe) + len(visited)):
+                self.abort(itertools.chain([node], fringe))
+                fringe.add(node)  # Still open, so it counts towards the bound
+                return
+            closed.add(node)
+            if observer is not None:
+                observer.expanded(len(fringe))
+                successors = observer.timed("successor", node.state.successor)
+                observer.generated(len(successors))
+            else:
+                successors = node.state.successor()
+            for child in successors:
+                self.nodeVisited += 1
+                last_seen = visited.get(child.state)
+                if last_seen is None:
+                    child_node = search.Node(child.state, node, child.action)
+                    node.addChildNode(child_node)
+                    visited[child.state] = child_node
+                    fringe.add(child_node)
+                    if self.isGoal(child.state):
+                        goals.append(child_node)
+                elif last_seen.getCost() > node.getCost() + child.action.cost:
+                    # A cheaper path also lowers g(n) of every descendant, which must then be expanded again
+                    for updated in last_seen.setParent(node, child.action):
+                        if not fringe.update(updated):
+                            if updated in closed:
+                                inconsistent[updated] = None
+                            else:
+                                fringe.add(updated)
+                    if observer is not None:
+                        observer.reopened(1)
+                elif observer is not None:
+                    observer.duplicated(1)
+
+
+class WaterJugSearchProblemGBF(SolvabilityCheck, PathCacheCheck, TableHeuristic, GBFSearchProblem):
     """
     A domain-dependent informed SearchProblem for the Water Jug Problem.
     This implementation uses Greedy Best-First Search with the 'Markings' heuristic.
@@ -338,8 +808,15 @@ class WaterJugSearchProblemGBF(GBFSearchProblem):
     def isGoal(self, state: WaterJugState):
         return state == self.goal
 
+    def cache_name(self):
+        """A table may lead a search to a different path, so it is cached apart from a search without one."""
+        return super().cache_name() + self.table_name()
+
     def heuristic(self, state: WaterJugState):
-        """Return the result of the 'Markings' heuristic function h(n), where n is a given ``WaterJugState``."""
+        """Return the result of the 'Markings' heuristic function h(n), where n is a given ``WaterJugState``,
+        or the exact cost to the goal from the ``heuristic_table``, if there is one."""
+        if self.heuristic_table is not None:
+            return self.heuristic_table.cost(state)
         result = 0.0
         deficit = 0
         excess = 0
@@ -374,7 +851,7 @@ class WaterJugSearchProblemGBF(GBFSearchProblem):
         return result
 
 
-class WaterJugSearchProblemAStar(AStarSearchProblem):
+class WaterJugSearchProblemAStar(SolvabilityCheck, PathCacheCheck, TableHeuristic, AStarSearchProblem):
     """
     A domain-dependent informed SearchProblem for the Water Jug Problem.
     This implementation uses A* Search with the 'Markings' heuristic.
@@ -401,8 +878,16 @@ class WaterJugSearchProblemAStar(AStarSearchProblem):
     def isGoal(self, state: WaterJugState):
         return state == self.goal
 
+    def cache_name(self):
+        """Weighted A* Search may find a dearer path, so it is cached apart from A* Search."""
+        name = super().cache_name() + self.table_name()
+        return name if self.weight == 1.0 else "{}(weight={})".format(name, self.weight)
+
     def heuristic(self, state: WaterJugState):
-        """Return the result of the 'Markings' heuristic function h(n), where n is a given ``WaterJugState``."""
+        """Return the result of the 'Markings' heuristic function h(n), where n is a given ``WaterJugState``,
+        or the exact cost to the goal from the ``heuristic_table``, if there is one."""
+        if self.heuristic_table is not None:
+            return self.heuristic_table.cost(state)
         result = 0.0
         deficit = 0
         excess = 0
@@ -437,6 +922,18 @@ class WaterJugSearchProblemAStar(AStarSearchProblem):
         return result
 
 
+class WaterJugSearchProblemIDAStar(WaterJugSearchProblemAStar):
+    """
+    A domain-dependent informed SearchProblem for the Water Jug Problem.
+    This implementation uses Iterative-Deepening A* Search with the 'Markings' heuristic,
+    so memory grows with the depth of the solution only, plus a transposition table of at most
+    ``transpositionLimit`` states. Set it to 0 to keep only the current path.
+    """
+
+    iterativeDeepening = True
+    transpositionLimit = 65536
+
+
 class JugOverflowException(Exception):
     """A custom ``Exception`` to prevent the user-input jug volume parameters from exceeding the jug capacities."""
 
@@ -485,8 +982,18 @@ def run():
     goal_state = WaterJugState(world, a_goal, b_goal)
     # problem = WaterJugSearchProblemBFS(initial_state, goal_state)
     # problem = WaterJugSearchProblemDFS(initial_state, goal_state)
+    # problem = WaterJugSearchProblemBidirectional(initial_state, goal_state)
+    # problem = WaterJugSearchProblemBidirectionalUCS(initial_state, goal_state)
     # problem = WaterJugSearchProblemGreedy(initial_state, goal_state)
     problem = WaterJugSearchProblemAStar(initial_state, goal_state)
+    # problem = WaterJugSearchProblemIDDFS(initial_state, goal_state)
+    # problem = WaterJugSearchProblemIDAStar(initial_state, goal_state)
+    # Reject an unreachable goal without searching
+    reason = unsolvable_reason(initial_state, goal_state)
+    if reason is not None:
+        print(problem)
+        print("No solution. {}".format(reason))
+        return
     # Search & print
     path = problem.search()
     print("Done!\n")
@@ -3,10 +3,106 @@
 
 import cm3038.search as search
 import math
+import heapq
+import itertools
+
+#fringe of a best-first search kept as a binary heap
+#nodes are ordered by f(n), then by g(n) with the higher g(n) first, then the most recently added node first
+#this is the same order binaryInsert(...) gives to a list fringe
+#a node whose f(n) changes is pushed again and its old heap entry is deleted lazily
+class HeapFringe:
+    #constructor
+    #problem is the best-first search problem providing the evaluation function
+    def __init__(self,problem):
+        self.problem=problem
+        self.evaluation=problem.nodeValue   #evaluation function f(n), kept on each node
+        self.heap=[]                        #heap of [f(n),-g(n),-insertion order,node] entries
+        self.entries={}                     #map from node in fringe to its live heap entry
+        self.counter=itertools.count()      #insertion order for tie-breaking
+
+    #number of nodes in fringe
+    def __len__(self):
+        return len(self.entries)
+
+    #check if a node is still waiting in fringe
+    def __contains__(self,node):
+        return node in self.entries
+
+    #iterate over the nodes waiting in fringe, in no particular order
+    def __iter__(self):
+        return iter(self.entries)
+
+    #add a node into fringe
+    def add(self,node):
+        entry=[self.evaluation(node),-node.getCost(),-next(self.counter),node]
+        self.entries[node]=entry
+        heapq.heappush(self.heap,entry)
+
+    #remove and return the node with the lowest f(n), or None if fringe is empty
+    def pop(self):
+        while self.heap:
+            node=heapq.heappop(self.heap)[-1]
+            if node!=None:                  #skip entries deleted by update(...)
+                del self.entries[node]
+                return node
+        return None
+
+    #move a node to its new position after its f(n) or g(n) has changed
+    #returns False if the node is no longer in fringe
+    def update(self,node):
+        entry=self.entries.get(node)
+        if entry==None:
+            return False
+        entry[-1]=None                      #lazily delete old entry
+        self.add(node)
+        return True
+
+#fringe of a best-first search kept as a sorted list
+#this is the original fringe using addChildBinary(...), each add and pop costs O(n)
+class ListFringe:
+    #constructor
+    #problem is the best-first search problem providing addChildBinary(...)
+    def __init__(self,problem):
+        self.problem=problem
+        self.list=[]
+
+    #number of nodes in fringe
+    def __len__(self):
+        return len(self.list)
+
+    #check if a node is still waiting in fringe
+    def __contains__(self,node):
+        return any(x is node for x in self.list)
+
+    #iterate over the nodes waiting in fringe, in order
+    def __iter__(self):
+        return iter(self.list)
+
+    #add a node into fringe
+    def add(self,node):
+        self.problem.addChildBinary(self.list,node)
+
+    #remove and return the 1st node, or None if fringe is empty
+    def pop(self):
+        if self.list==[]:
+            return None
+        return self.list.pop(0)
+
+    #move a node to its new position after its f(n) or g(n) has changed
+    #returns False if the node is no longer in fringe
+    def update(self,node):
+        for i in range(0,len(self.list)):
+            if self.list[i] is node:
+                del self.list[i]
+                self.add(node)
+                return True
+        return False
 
 #best-first search is a subclass of search problem
 class BestFirstSearchProblem(search.SearchProblem):
     goalState=None                  #most best-first search need a goal to compute f(n)
+    fringeClass=HeapFringe          #fringe implementation, use ListFringe for the original sorted list
+    iterativeDeepening=False        #True for IDA*, which bounds f(n) instead of depth
     
     #constructor
     #we assume there is an initial and goal states
@@ -14,48 +110,102 @@ class BestFirstSearchProblem(search.SearchProblem):
         super().__init__(start)
         self.goalState=goal
 
-    #best-first search
-    def search(self):
+    #best-first search in steps, run by search() and searchAsync()
+    def searchSteps(self):
+        if self.iterativeDeepening:
+            return (yield from self.iterativeDeepeningSteps())   #IDA* using contourValue(...) below
+
+        self.startBudget()
+        observer=self.observer
         visitedNodes={} #create empty history map
-        fringe=[]       #empty fringe list
+        fringe=self.createFringe()      #empty fringe
         rootNode=search.Node(self.startState,None,None)    #create root node
-        fringe.append(rootNode)                     #add root node into fringe
+        fringe.add(rootNode)                        #add root node into fringe
         
         visitedNodes[rootNode.state]=rootNode       #put state-node pair into visited node map
         self.nodeVisited+=1                         #increment visited node count
 
-        if self.nodeVisited%1000==0:
-            print("No. of nodes explored: {}\n".format(self.nodeVisited))   #print message every 1000 nodes
-
         while True:
-            if fringe==[]:  #fringe is empty
+            if len(fringe)==0:  #fringe is empty
                 return None #no solution
             
-            node=fringe.pop(0)                      #remove 1st node from fringe list
+            node=fringe.pop()                       #remove node with lowest f(n) from fringe
             if self.isGoal(node.state):             #goal state found
                 return self.constructPath(node)     #construct path and return
+            if self.overBudget(len(fringe)+len(visitedNodes)):
+                return self.abort(itertools.chain([node],fringe))   #stop with the node with lowest f(n) as best
+            if self.nodeExpanded%self.stepSize==0:
+                yield                               #hand control back every stepSize expansions
 
-            successors=node.state.successor()  #get all successors
+            if observer!=None:
+                observer.expanded(len(fringe))
+                successors=observer.timed("successor",node.state.successor)
+                observer.generated(len(successors))
+            else:
+                successors=node.state.successor()  #get all successors
             for child in successors:
                 self.nodeVisited+=1
-                if self.nodeVisited%1000==0:
-                    print("No. of nodes explored: {}\n".format(self.nodeVisited))   #print message every 1000 nodes
                 action=child.action     #get action from action-state pair
                 nextState=child.state   #get next state from action-state pair
                 lastSeenNode=visitedNodes.get(nextState)    #look up next state from history map
                 if lastSeenNode==None:  #have not seen this state before
                     childNode=search.Node(nextState,node,action)   #create child node from state
-                    self.addChildBinary(fringe,childNode)                 #add child into fringe
+                    node.addChildNode(childNode)                    #track child so cost changes can propagate to it
+                    fringe.add(childNode)                           #add child into fringe
                     visitedNodes[nextState]=childNode               #add next state and childnode pair into history map
                 else:
                     if lastSeenNode.getCost()>action.cost+node.getCost():    #this new path is cheaper
-                        lastSeenNode.parent=node    #go through the current node to reach this next state
-                        lastSeenNode.action=action  #update action too
+                        #go through the current node to reach this next state
+                        #this updates the cost of the node and all its descendants
+                        for updatedNode in lastSeenNode.setParent(node,action):
+                            fringe.update(updatedNode)  #move node to its new position if still in fringe
+                        if observer!=None:
+                            observer.reopened(1)
+                    elif observer!=None:
+                        observer.duplicated(1)
+
+    #the node with lowest f(n) in the fringe is the most promising when a limit is hit
+    def frontierScore(self,node):
+        return self.nodeValue(node)
+
+    #f(n) of a node, computed once by evaluation(...) and kept on the node until it is re-parented
+    def nodeValue(self,node):
+        value=node.value
+        if value==None:
+            value=node.value=self.evaluation(node)
+        return value
+
+    #h(n) of a node, for problems with a heuristic(...) function of a state
+    #it is computed once and kept on the node, which stays the only node of its state when it is re-parented
+    def nodeHeuristic(self,node):
+        estimate=node.estimate
+        if estimate==None:
+            estimate=node.estimate=self.heuristic(node.state)
+        return estimate
+
+    #create an empty fringe
+    def createFringe(self):
+        return self.observeFringe(self.fringeClass(self))
+
+    #let the observer, if any, also time the evaluation of nodes by a fringe which keeps the evaluation function
+    def observeFringe(self,fringe):
+        if self.observer!=None and hasattr(fringe,"evaluation"):
+            fringe.evaluation=self.observer.timer("evaluation",fringe.evaluation)
+        return super().observeFringe(fringe)
+
+    #IDA* bounds the f(n) value of nodes in each iteration
+    def contourValue(self,node):
+        return self.nodeValue(node)
+
+    #IDA* remembers the g(n) value of states in the transposition table
+    def contourKey(self,node):
+        return node.getCost()
 
     #add new node into fringe using linear search based on f(n) value
     def addChildLinear(self,fringe,childNode):
+        childValue=self.nodeValue(childNode)        #f(n) of child, computed once
         for i in range(0,len(fringe)):              #scan fringe list
-            if self.evaluation(childNode)<self.evaluation(fringe[i]): #find position where node is just bigger than child in evaluation function value
+            if childValue<self.nodeValue(fringe[i]): #find position where node is just bigger than child in evaluation function value
                 fringe.insert(i,childNode)      #add child just before that node
                 return                          #exit, no need to continue
         fringe.append(childNode)    #if you hit the end of list, add child to the end
@@ -70,14 +220,14 @@ class BestFirstSearchProblem(search.SearchProblem):
         if right==None:
             right=len(fringe)-1
     
+        nodeValue=self.nodeValue(node)                          #f(n) value of new node, computed once
         while True:        
             if left>right:
                 fringe.insert(left,node)
                 return
 
-            nodeValue=self.evaluation(node)                     #f(n) value of new node   
             if left==right:                                     #left meets right
-                leftValue=self.evaluation(fringe[left])         #f(n) of node at position left
+                leftValue=self.nodeValue(fringe[left])          #f(n) of node at position left
                 if leftValue>nodeValue:         #new node goes before left
                     fringe.insert(left,node)
                     return
@@ -93,7 +243,7 @@ class BestFirstSearchProblem(search.SearchProblem):
             #has at least 2 elements in range
             else:    
                 mid=math.floor((left+right)/2)          #find middle position
-                midValue=self.evaluation(fringe[mid])   #find f(n) value of node at position mid
+                midValue=self.nodeValue(fringe[mid])    #find f(n) value of node at position mid
                 if midValue==nodeValue:                 #the same f(n) value
                     if fringe[mid].getCost()>node.getCost():    #g(n) of new node is lower, thus less certain
                         fringe.insert(mid+1,node)               #new node goes after old node
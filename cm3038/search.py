@@ -1,6 +1,12 @@
 #cm3038 library Python version
 #By K. Hui
 
+from collections import deque
+import asyncio
+import heapq
+import itertools
+import time
+
 """Model an action that changes a state into another state.
 All your domain-specific action classes must extend this superclass.
 """
@@ -25,6 +31,8 @@ class Action:
 All your domain-specific state classes must be extend this superclass.
 """
 class State:
+    __slots__=()    #allows subclasses to use __slots__ for compact states
+
     """Return the state as a str.
     You are expected to override this method in your domain-specfic state subclasses
     to customise how a state will be printed.
@@ -54,6 +62,16 @@ class State:
     def successor(self):    #to be defined
         pass
 
+    """Return all actions and corresponding previous states which lead to the current state.
+    You only need to override this method if you use a bidirectional search.
+    It must be consistent with successor(), i.e. for every pair returned, applying its action to its state
+    gives the current state.
+    :returns: All action-state pairs leading to this state as a list of ActionStatePair objects.
+    :rtype: a list of ActionStatePair objects.
+    """
+    def predecessor(self):  #to be defined
+        pass
+
 """Model an action-state pair.
 Note: We don't really need this in Python as we can use a tuple.
 But for simplicity I am porting this over from the Java version.
@@ -91,37 +109,64 @@ class Node:
         self.state=state
         self.parent=parent
         self.action=action
+        self.children=None      #children nodes, only tracked by searches which re-parent nodes
+        self.value=None         #f(n), kept by best-first searches until the path cost changes
+        self.estimate=None      #h(n), which only depends on the state, so it is kept when the node is re-parented
+        #path cost and depth are cached so that they need not be computed by walking up to the root
+        if parent==None:
+            self.cost=0.0
+            self.depth=0
+        else:
+            self.cost=parent.cost+action.cost
+            self.depth=parent.depth+1
 
     """Return path cost from the root node to this node.
     """
     def getCost(self):
-        '''recursive version may crash on very deep path
-        if self.parent==None:
-            return 0.0
-        return self.action.cost+self.parent.getCost()
-        '''
-        #iterative version to remove tail recursion
-        result=0.0
-        current=self
-        while current.parent!=None:
-            result+=current.action.cost
-            current=current.parent
-        return result
+        return self.cost
 
     """Return the path depth from the root node to this node.
     """
     def getDepth(self):
-        '''recursive version may crash on very deep path
-        if self.parent==None:
-            return 0
-        return self.parent.getDepth()+1
-        '''
-        #iterative version to remove tail recursion
-        result=0
-        current=self
-        while current.parent!=None:
-            result+=1
-            current=current.parent
+        return self.depth
+
+    """Register a child node so that a change of path cost can be propagated to it.
+    :param childNode: A node whose parent is this node.
+    :type childNode: A Node.
+    """
+    def addChildNode(self,childNode):
+        if self.children==None:
+            self.children=[]
+        self.children.append(childNode)
+
+    """Change the parent of this node when a cheaper path to its state is found.
+    Always use this method instead of assigning to the parent attribute, so that the cached
+    path cost, depth and f(n) of this node and all its registered descendants are updated.
+    :param parent: The new parent node.
+    :type parent: A Node.
+    :param action: The Action that leads the new parent node to this node.
+    :type action: An Action.
+    :returns: All nodes whose path cost and depth have been updated, starting with this node.
+    :rtype: A list of Node.
+    """
+    def setParent(self,parent,action):
+        if self.parent!=None and self.parent.children!=None:
+            self.parent.children.remove(self)   #detach from old parent
+        self.parent=parent
+        self.action=action
+        parent.addChildNode(self)
+        
+        #iterative propagation down the subtree to avoid deep recursion
+        result=[]
+        stack=[self]
+        while stack:
+            node=stack.pop()
+            node.cost=node.parent.cost+node.action.cost
+            node.depth=node.parent.depth+1
+            node.value=None     #f(n) depends on the path cost, so it is computed again when needed
+            result.append(node)
+            if node.children!=None:
+                stack.extend(node.children)
         return result
 
 """Model a path which is the result of a successful search.
@@ -159,47 +204,577 @@ class Path:
     def insert(self,index,data):
         self.list.insert(index,data)
     
+"""Model a first-in-first-out fringe backed by a deque.
+Adding and removing a node are both O(1). This fringe gives breadth-first search.
+"""
+class QueueFringe:
+    """Create an empty QueueFringe.
+    """
+    def __init__(self):
+        self.queue=deque()
+
+    """Return the number of nodes in the fringe.
+    """
+    def __len__(self):
+        return len(self.queue)
+
+    """Add a node to the back of the fringe.
+    :param node: The node to add.
+    :type node: A Node.
+    """
+    def add(self,node):
+        self.queue.append(node)
+
+    """Remove and return the node at the front of the fringe.
+    :returns: The oldest node in the fringe.
+    :rtype: A Node.
+    """
+    def pop(self):
+        return self.queue.popleft()
+
+    """Iterate over the nodes in the fringe, from front to back.
+    """
+    def __iter__(self):
+        return iter(self.queue)
+
+"""Model a last-in-first-out fringe backed by a list.
+Adding and removing a node are both O(1). This fringe gives depth-first search.
+"""
+class StackFringe:
+    """Create an empty StackFringe.
+    """
+    def __init__(self):
+        self.stack=[]
+
+    """Return the number of nodes in the fringe.
+    """
+    def __len__(self):
+        return len(self.stack)
+
+    """Add a node to the top of the fringe.
+    :param node: The node to add.
+    :type node: A Node.
+    """
+    def add(self,node):
+        self.stack.append(node)
+
+    """Remove and return the node at the top of the fringe.
+    :returns: The newest node in the fringe.
+    :rtype: A Node.
+    """
+    def pop(self):
+        return self.stack.pop()
+
+    """Iterate over the nodes in the fringe, from bottom to top.
+    """
+    def __iter__(self):
+        return iter(self.stack)
+
+"""Model an observer of a search, which is told about every expansion.
+Set the observer attribute of a search problem to an instance of a subclass to instrument its search.
+When observer is None, the search makes no calls to it at all.
+All methods here do nothing, so a subclass only overrides those it needs.
+"""
+class SearchObserver:
+    """Called when a search starts.
+    :param problem: The search problem.
+    :type problem: A SearchProblem.
+    """
+    def started(self,problem):
+        pass
+
+    """Called when a node is expanded.
+    :param fringeSize: The no. of nodes waiting in the fringe.
+    :type fringeSize: An int.
+    """
+    def expanded(self,fringeSize):
+        pass
+
+    """Called when children are generated, including those dropped afterwards as duplicates.
+    :param count: The no. of children.
+    :type count: An int.
+    """
+    def generated(self,count):
+        pass
+
+    """Called when nodes are dropped because their states are already seen, with a path as cheap or cheaper.
+    :param count: The no. of nodes.
+    :type count: An int.
+    """
+    def duplicated(self,count):
+        pass
+
+    """Called when states already seen are reached by a cheaper path.
+    :param count: The no. of states.
+    :type count: An int.
+    """
+    def reopened(self,count):
+        pass
+
+    """Call a function as part of a phase of the search, which the observer may time.
+    :param phase: The name of the phase, i.e. "successor", "evaluation" or "insertion".
+    :type phase: A str.
+    :param function: The function to call without arguments.
+    :type function: A callable.
+    :returns: The result of the function.
+    """
+    def timed(self,phase,function):
+        return function()
+
+    """Wrap a function so every call is a part of a phase of the search, which the observer may time.
+    :param phase: The name of the phase.
+    :type phase: A str.
+    :param function: The function to wrap.
+    :type function: A callable.
+    :returns: The wrapped function.
+    :rtype: A callable.
+    """
+    def timer(self,phase,function):
+        return function
+
+    """Return what the observer has collected.
+    :returns: An empty dictionary.
+    :rtype: A dict.
+    """
+    def asDict(self):
+        return {}
+
+"""Model an observer which counts expansions, generations, duplicates and reopenings,
+keeps the max. fringe size, and times the successor, evaluation and insertion phases.
+Timing a call costs more than most calls themselves, so only 1 in every sampleEvery calls of a phase is timed,
+and the total time of the phase is estimated from the sample. Insertion time includes evaluation time,
+as a best-first fringe evaluates a node when it is added.
+"""
+class SearchMetrics(SearchObserver):
+    """Create a SearchMetrics.
+    :param sampleEvery: Time 1 in every sampleEvery calls of each phase. 1 times every call.
+    :type sampleEvery: An int.
+    """
+    def __init__(self,sampleEvery=64):
+        self.sampleEvery=sampleEvery
+        self.started(None)
+
+    """Reset all counters and timers.
+    :param problem: The search problem.
+    :type problem: A SearchProblem.
+    """
+    def started(self,problem):
+        self.expansions=0
+        self.generations=0
+        self.duplicates=0
+        self.reopenings=0
+        self.maxFringe=0
+        self.calls={}       #phase to no. of calls
+        self.samples={}     #phase to no. of timed calls
+        self.seconds={}     #phase to seconds spent in timed calls
+
+    def expanded(self,fringeSize):
+        self.expansions+=1
+        if fringeSize>self.maxFringe:
+            self.maxFringe=fringeSize
+
+    def generated(self,count):
+        self.generations+=count
+
+    def duplicated(self,count):
+        self.duplicates+=count
+
+    def reopened(self,count):
+        self.reopenings+=count
+
+    def timed(self,phase,function):
+        calls=self.calls.get(phase,0)
+        self.calls[phase]=calls+1
+        if calls%self.sampleEvery!=0:   #not sampled
+            return function()
+        start=time.perf_counter()
+        result=function()
+        self.seconds[phase]=self.seconds.get(phase,0.0)+time.perf_counter()-start
+        self.samples[phase]=self.samples.get(phase,0)+1
+        return result
+
+    def timer(self,phase,function):
+        def timedFunction(*args):
+            return self.timed(phase,lambda:function(*args))
+        return timedFunction
+
+    """Return the counters and the estimated seconds spent in each phase.
+    :returns: A map from the name of each metric to its value.
+    :rtype: A dict.
+    """
+    def asDict(self):
+        result={"expansions":self.expansions,"generations":self.generations,"duplicates":self.duplicates,
+            "reopenings":self.reopenings,"maxFringe":self.maxFringe}
+        for phase,calls in self.calls.items():
+            result[phase+"Calls"]=calls
+            result[phase+"Seconds"]=self.seconds.get(phase,0.0)*calls/self.samples.get(phase,1)
+        return result
+
+"""Model the outcome of a search, as returned by SearchProblem.solve().
+The status is SOLVED with the path found, EXHAUSTED if there is no solution,
+or BUDGET_EXCEEDED if the search was stopped by one of its limits.
+In the last case, limit names the limit hit and bestNode is the most promising node left in the fringe.
+"""
+class SearchResult:
+    SOLVED="solved"
+    EXHAUSTED="exhausted"
+    BUDGET_EXCEEDED="budget-exceeded"
+
+    """Create a SearchResult from a search problem after its search.
+    :param problem: The search problem.
+    :type problem: A SearchProblem.
+    :param path: The path returned by the search.
+    :type path: A Path, or None.
+    """
+    def __init__(self,problem,path):
+        if path!=None:
+            self.status=SearchResult.SOLVED
+        elif problem.limit!=None:
+            self.status=SearchResult.BUDGET_EXCEEDED
+        else:
+            self.status=SearchResult.EXHAUSTED
+        self.path=path
+        self.limit=problem.limit                #"nodes", "time", "memory" or None
+        self.bestNode=problem.bestNode          #only set when a limit is hit
+        self.nodeVisited=problem.nodeVisited    #nodes generated
+        self.nodeExpanded=problem.nodeExpanded  #nodes expanded
+        self.peakMemory=problem.peakMemory      #max. no. of nodes and states held at once
+        self.elapsed=time.perf_counter()-problem.startTime  #seconds
+        self.metrics=problem.observer.asDict() if problem.observer!=None else None
+
+    """Return a one-line summary of the result.
+    """
+    def __str__(self):
+        result="{}: {} nodes visited, {} expanded, {} held, {:.3f}s".format(self.status,self.nodeVisited,
+            self.nodeExpanded,self.peakMemory,self.elapsed)
+        if self.limit!=None:
+            result+=" ({} limit)".format(self.limit)
+        return result
+
 """Model an uninformed search.
+The fringe strategy is chosen by the fringeClass attribute.
+Use QueueFringe for breadth-first search and StackFringe for depth-first search.
+Set filterOnGeneration to True to drop children whose states are already visited or waiting in the fringe.
+The fringe then never holds more than one node per state. BFS still returns the same shortest-depth path.
+DFS may not, as a state is then kept at the depth it was first generated, so leave it off for DFS.
 """
 class SearchProblem:
+    fringeClass=QueueFringe     #default fringe strategy is BFS
+    filterOnGeneration=False    #default is to check for repeated states only when a node is removed from fringe
+    iterativeDeepening=False    #True to search by iterative deepening, which keeps only the current path in memory
+    transpositionLimit=0        #max. no. of states remembered in each iteration of iterative deepening, 0 for none
+    nodeLimit=None              #max. no. of nodes expanded, None for no limit
+    timeLimit=None              #max. no. of seconds of searching, None for no limit
+    memoryLimit=None            #max. no. of nodes and states held in the fringe and history, None for no limit
+    observer=None               #a SearchObserver to instrument the search, None for no instrumentation
+    stepSize=1000               #no. of node expansions between two steps of searchSteps()
+
     """Create a SearchProblem.
     :param start: The initial state.
     :type start: A State. You are expected to use a domain-specific State subclass.
     """
     def __init__(self,start):
         self.startState=start
-        self.nodeVisited=0
+        self.startBudget()
+
+    """To search for a solution within the limits.
+    Unlike search(), the result tells a search stopped by a limit apart from one with no solution.
+    :returns: The outcome of the search.
+    :rtype: A SearchResult.
+    """
+    def solve(self):
+        self.startBudget()
+        return SearchResult(self,self.search())
+
+    """To search for a solution without blocking the event loop of asyncio.
+    Control goes back to the event loop every stepSize node expansions. If the task is cancelled,
+    the search is closed and asyncio.CancelledError is raised. Every search keeps its fringe and history to itself,
+    so a cancelled problem can be searched again.
+    :returns: The solution of the search as a Path. Or None if no solution is found.
+    :rtype: A Path.
+    """
+    async def searchAsync(self):
+        steps=self.searchSteps()
+        try:
+            while True:
+                try:
+                    next(steps)
+                except StopIteration as stop:
+                    return stop.value
+                await asyncio.sleep(0)      #let other tasks run
+        finally:
+            steps.close()
+
+    """To search for a solution within the limits without blocking the event loop of asyncio.
+    :returns: The outcome of the search.
+    :rtype: A SearchResult.
+    """
+    async def solveAsync(self):
+        self.startBudget()
+        return SearchResult(self,await self.searchAsync())
+
+    """Reset the counters and the clock checked against the limits.
+    Every search calls this when it starts.
+    """
+    def startBudget(self):
+        self.nodeVisited=0      #so the counters of a search never include those of an earlier one
+        self.nodeExpanded=0
+        self.peakMemory=0
+        self.limit=None         #the limit hit, if any
+        self.bestNode=None      #most promising node in the fringe when a limit is hit
+        self.startTime=time.perf_counter()
+        if self.observer!=None:
+            self.observer.started(self)
+
+    """Count a node expansion and check if a limit is hit.
+    :param memory: The no. of nodes and states held in the fringe and history.
+    :type memory: An int.
+    :returns: True if the search must stop.
+    :rtype: A True or False.
+    """
+    def overBudget(self,memory):
+        self.nodeExpanded+=1
+        if memory>self.peakMemory:
+            self.peakMemory=memory
+        if self.nodeLimit!=None and self.nodeExpanded>self.nodeLimit:
+            self.limit="nodes"
+        elif self.memoryLimit!=None and memory>self.memoryLimit:
+            self.limit="memory"
+        elif self.timeLimit!=None and time.perf_counter()-self.startTime>self.timeLimit:
+            self.limit="time"
+        return self.limit!=None
+
+    """Stop a search because a limit is hit, and keep the most promising node left.
+    :param frontier: The nodes not yet expanded.
+    :type frontier: An iterable of Node.
+    :returns: None, which the search returns in place of a path.
+    """
+    def abort(self,frontier):
+        bestScore=None
+        for node in frontier:
+            score=self.frontierScore(node)
+            if bestScore==None or score<bestScore:
+                self.bestNode=node
+                bestScore=score
+        return None
+
+    """The score of a node left in the fringe when a limit is hit, the lower the more promising.
+    :param node: A node.
+    :type node: A Node.
+    :returns: Minus the depth of the node, so the deepest node is the most promising.
+    :rtype: An int.
+    """
+    def frontierScore(self,node):
+        return -node.getDepth()
 
     """To search for a solution.
     :returns: The solution of the search as a Path. Or None if no solution is found.
     :rtype: A Path.
     """        
     def search(self):
+        steps=self.searchSteps()
+        while True:
+            try:
+                next(steps)     #run the search to the end
+            except StopIteration as stop:
+                return stop.value
+
+    """To search for a solution in steps.
+    This is a generator which yields None every stepSize node expansions, and returns the result of the search.
+    search() and searchAsync() run it. Override this method, rather than search(), to change the search.
+    :returns: The solution of the search as a Path. Or None if no solution is found.
+    :rtype: A Path.
+    """
+    def searchSteps(self):
+        if self.iterativeDeepening:
+            return (yield from self.iterativeDeepeningSteps())
+
+        self.startBudget()
+        observer=self.observer
         visitedState=set()  #empty set of visited states
-        fringe=[]       #empty list of fringe
+        openState=set()     #states of nodes in fringe, only used when filtering on generation
+        fringe=self.createFringe()  #empty fringe
         
         newNode=Node(self.startState,None,None)   #create node from initial state
-        fringe.append(newNode)                          #add into fringe
+        fringe.add(newNode)                             #add into fringe
+        openState.add(newNode.state)
         self.nodeVisited+=1
         
         
         while True:
-            if fringe==[]:   #no more node in fringe
+            if len(fringe)==0:  #no more node in fringe
                 return None         #no solution
             
-            node=fringe.pop(0)      #remove 1st node from fringe
+            node=fringe.pop()       #remove next node from fringe
+            if self.filterOnGeneration:
+                openState.discard(node.state)   #state is no longer in fringe
 
             if self.isGoal(node.state): #goal is found
                 return self.constructPath(node)
             
             if not node.state in visitedState:  #state of node not in history
-                childrenNodes=node.state.successor()    #expand node to get children
+                if self.overBudget(len(fringe)+len(visitedState)+len(openState)):
+                    return self.abort(itertools.chain([node],fringe))
+                if self.nodeExpanded%self.stepSize==0:
+                    yield
+                if observer!=None:
+                    observer.expanded(len(fringe))
+                    childrenNodes=observer.timed("successor",node.state.successor)
+                    observer.generated(len(childrenNodes))
+                else:
+                    childrenNodes=node.state.successor()    #expand node to get children
                 visitedState.add(node.state)            #add state into history
+                if self.filterOnGeneration:
+                    count=len(childrenNodes)
+                    childrenNodes=self.filterChildren(childrenNodes,visitedState,openState)
+                    if observer!=None:
+                        observer.duplicated(count-len(childrenNodes))
                 self.addChildrenNodes(fringe,node,childrenNodes)  #add children into fringe
+            elif observer!=None:
+                observer.duplicated(1)
+
+    """Create an empty fringe of the fringeClass.
+    :returns: An empty fringe.
+    :rtype: An instance of fringeClass.
+    """
+    def createFringe(self):
+        return self.observeFringe(self.fringeClass())
+
+    """Let the observer, if any, time the insertion of nodes into a fringe.
+    :param fringe: An empty fringe.
+    :type fringe: Any object with add(...) and pop() methods.
+    :returns: The same fringe.
+    """
+    def observeFringe(self,fringe):
+        if self.observer!=None:
+            fringe.add=self.observer.timer("insertion",fringe.add)
+        return fringe
+
+    """To search for a solution by iterative deepening, in steps as searchSteps().
+    A bounded depth-first search is repeated with the bound raised to the smallest value which went over it,
+    until a goal is found within the bound. Only the current path is kept in memory, plus a transposition table
+    of at most transpositionLimit states.
+    :returns: The solution of the search as a Path. Or None if no solution is found.
+    :rtype: A Path.
+    """
+    def iterativeDeepeningSteps(self):
+        self.startBudget()
+        rootNode=Node(self.startState,None,None)    #create root node
+        self.nodeVisited+=1
+        if self.isGoal(rootNode.state):
+            return self.constructPath(rootNode)
+        bound=self.contourValue(rootNode)           #first bound covers the root only
+        while bound!=None:
+            goalNode,bound=yield from self.contourSearch(rootNode,bound)
+            if goalNode!=None:
+                return self.constructPath(goalNode)
+        return None     #no node went over the bound, so the whole space is searched
+
+    """Depth-first search of the nodes within a bound, in steps as searchSteps().
+    States already on the current path are skipped. If transpositionLimit is above 0, the states seen in this
+    iteration are remembered with their contourKey(...) until the limit is reached, and a state seen again with
+    the same or a higher key is skipped.
+    :param rootNode: The root node.
+    :type rootNode: A Node.
+    :param bound: The highest contourValue(...) of a node to be explored.
+    :type bound: A number.
+    :returns: The goal node or None, and the smallest contourValue(...) over the bound or None if there is none.
+    :rtype: A tuple of a Node and a number.
+    """
+    def contourSearch(self,rootNode,bound):
+        observer=self.observer
+        nextBound=None
+        table={}        #transposition table, state to key
+        limit=self.transpositionLimit
+        onPath={rootNode.state}                                 #states on the current path
+        stack=[(rootNode,iter(rootNode.state.successor()))]     #current path with the children left to explore
+
+        while len(stack)>0:
+            node,children=stack[-1]
+            actionState=next(children,None)
+            if actionState==None:   #all children explored, backtrack
+                stack.pop()
+                onPath.discard(node.state)
+                continue
+            childState=actionState.state
+            if observer!=None:
+                observer.generated(1)
+            if childState in onPath:    #cycle
+                if observer!=None:
+                    observer.duplicated(1)
+                continue
+            childNode=Node(childState,node,actionState.action)
+            self.nodeVisited+=1
+            value=self.contourValue(childNode)
+            if value>bound:         #leave it to the next iteration
+                if nextBound==None or value<nextBound:
+                    nextBound=value
+                continue
+            if self.isGoal(childState):
+                return childNode,None
+            if limit>0:
+                key=self.contourKey(childNode)
+                seenKey=table.get(childState)
+                if seenKey!=None and seenKey<=key:  #already explored from here with as much bound left
+                    if observer!=None:
+                        observer.duplicated(1)
+                    continue
+                if seenKey!=None or len(table)<limit:
+                    table[childState]=key
+            if self.overBudget(len(stack)+len(table)):
+                return self.abort([childNode]),None
+            if self.nodeExpanded%self.stepSize==0:
+                yield
+            onPath.add(childState)
+            if observer!=None:
+                observer.expanded(len(stack))
+                stack.append((childNode,iter(observer.timed("successor",childState.successor))))
+            else:
+                stack.append((childNode,iter(childState.successor())))
+        return None,nextBound
+
+    """The value of a node compared against the bound of iterative deepening.
+    :param node: A node.
+    :type node: A Node.
+    :returns: The depth of the node.
+    :rtype: An int.
+    """
+    def contourValue(self,node):
+        return node.getDepth()
+
+    """The value of a node kept in the transposition table of iterative deepening.
+    A lower key means more of the bound is left to explore from the node.
+    :param node: A node.
+    :type node: A Node.
+    :returns: The depth of the node.
+    :rtype: An int.
+    """
+    def contourKey(self,node):
+        return node.getDepth()
+
+    """Remove children whose states are already visited or already waiting in the fringe.
+    The states of the remaining children are added to the open set as they will be put into the fringe.
+    :param childrenNodes: A list of ActionStatePair on expanding a node.
+    :type childrenNodes: A list of ActionStatePair.
+    :param visitedState: The states already expanded.
+    :type visitedState: A set of State.
+    :param openState: The states of nodes waiting in the fringe.
+    :type openState: A set of State.
+    :returns: The children with new states.
+    :rtype: A list of ActionStatePair.
+    """
+    def filterChildren(self,childrenNodes,visitedState,openState):
+        result=[]
+        for actionState in childrenNodes:
+            childState=actionState.state
+            if not childState in visitedState and not childState in openState:
+                openState.add(childState)   #also drops a repeated state among the children themselves
+                result.append(actionState)
+        return result
 
     """To add a list of nodes into the fringe.
     :param fringe: The fringe of unexplored nodes.
-    :type fringe: A list of Node.
+    :type fringe: A QueueFringe, StackFringe or any object with the same add(...) and pop() methods.
     :param parentNode: The parent node of these children nodes.
     :type parentNode: A Node.
     :param childrenNodes: A list of ActionStatePair on expanding the parent node.
@@ -215,13 +790,13 @@ class SearchProblem:
 
     """Add a child node into the fringe.
     This method is used by addChildrenNodes(...) to add a single child into the fringe.
-    :param fringe: The list of Node waiting to be explored.
-    :type fringe: A list of Node.
-    :param childNode: An ActionStatePair representing a child after expanding a node.
-    :type childNode: An ActionStatePair.
+    :param fringe: The fringe of nodes waiting to be explored.
+    :type fringe: A QueueFringe, StackFringe or any object with the same add(...) and pop() methods.
+    :param childNode: A child node after expanding a node.
+    :type childNode: A Node.
     """    
     def addChild(self,fringe,childNode):
-        fringe.append(childNode)    #default is append to the end of the fringe. i.e. BFS
+        fringe.add(childNode)       #the fringe decides the order, i.e. BFS for QueueFringe
 
     """Build a Path by reverse traversing a tree from a node to the root.
     The node contains a goal state. By reversely following the parent node all the
@@ -250,3 +825,221 @@ class SearchProblem:
     """
     def isGoal(self,state):
         pass
+
+"""Model a bidirectional breadth-first search.
+One search tree grows forward from the start and another grows backward from the goal, one whole layer at a time,
+always on the side with the smaller layer. The search stops when the trees meet.
+This expands roughly 2*b^(d/2) nodes instead of b^d. The path found has the fewest actions.
+The states must override predecessor().
+"""
+class BidirectionalSearchProblem(SearchProblem):
+    """Create a BidirectionalSearchProblem.
+    :param start: The initial state.
+    :type start: A State. You are expected to use a domain-specific State subclass.
+    :param goal: The goal state.
+    :type goal: A State. You are expected to use a domain-specific State subclass.
+    """
+    def __init__(self,start,goal):
+        super().__init__(start)
+        self.goalState=goal
+
+    """To search for a solution in steps.
+    :returns: The solution of the search as a Path. Or None if no solution is found.
+    :rtype: A Path.
+    """
+    def searchSteps(self):
+        self.startBudget()
+        forwardRoot=Node(self.startState,None,None)
+        if self.startState==self.goalState:
+            return self.constructPath(forwardRoot)
+        backwardRoot=Node(self.goalState,None,None)
+        forward={self.startState:forwardRoot}   #forward tree as state-node map
+        backward={self.goalState:backwardRoot}  #backward tree as state-node map, parents lead towards the goal
+        forwardLayer=[forwardRoot]
+        backwardLayer=[backwardRoot]
+        self.nodeVisited+=2
+
+        while forwardLayer and backwardLayer:
+            if len(forwardLayer)<=len(backwardLayer):   #grow the smaller side
+                nextLayer,meeting=yield from self.expandLayer(forwardLayer,forward,backward,True)
+                if self.limit!=None:    #a meeting in a partly expanded layer may not give the shortest path
+                    return self.abort(forwardLayer+nextLayer)
+                forwardLayer=nextLayer
+            else:
+                backwardLayer,meeting=yield from self.expandLayer(backwardLayer,backward,forward,False)
+                if self.limit!=None:
+                    return self.abort(forwardLayer)
+            if meeting!=None:
+                return self.splicePath(forward[meeting],backward[meeting])
+        return None     #one side ran out of states, so no solution
+
+    """Expand a whole layer of one search tree, in steps as searchSteps().
+    :param layer: The nodes of the deepest layer of the tree.
+    :type layer: A list of Node.
+    :param tree: The tree being grown.
+    :type tree: A dict of State to Node.
+    :param other: The tree growing from the other end.
+    :type other: A dict of State to Node.
+    :param isForward: True to follow successor(), False to follow predecessor().
+    :type isForward: A True or False.
+    :returns: The next layer, and the state where the trees meet with the fewest actions in total or None.
+    :rtype: A tuple of a list of Node and a State.
+    """
+    def expandLayer(self,layer,tree,other,isForward):
+        observer=self.observer
+        nextLayer=[]
+        meeting=None
+        meetingDepth=None
+        for node in layer:
+            if self.overBudget(len(tree)+len(other)):
+                break
+            if self.nodeExpanded%self.stepSize==0:
+                yield
+            expand=node.state.successor if isForward else lambda:self.predecessors(node.state)
+            if observer!=None:
+                observer.expanded(len(layer))
+                pairs=observer.timed("successor",expand)
+                observer.generated(len(pairs))
+            else:
+                pairs=expand()
+            for actionState in pairs:
+                state=actionState.state
+                if state in tree:   #already in this tree at the same or a lower depth
+                    if observer!=None:
+                        observer.duplicated(1)
+                    continue
+                childNode=Node(state,node,actionState.action)
+                tree[state]=childNode
+                nextLayer.append(childNode)
+                self.nodeVisited+=1
+                otherNode=other.get(state)
+                if otherNode!=None and (meeting==None or childNode.depth+otherNode.depth<meetingDepth):
+                    meeting=state
+                    meetingDepth=childNode.depth+otherNode.depth
+        return nextLayer,meeting
+
+    """Return the predecessors of a state for the backward search.
+    By default this is state.predecessor(). Override it to drop predecessors which cannot be reached from the start.
+    :param state: The state to find predecessors of.
+    :type state: A State.
+    :returns: All action-state pairs leading to the state.
+    :rtype: A list of ActionStatePair.
+    """
+    def predecessors(self,state):
+        return state.predecessor()
+
+    """Build a Path through the state where the forward and backward trees meet.
+    :param forwardNode: The node of the meeting state in the forward tree.
+    :type forwardNode: A Node.
+    :param backwardNode: The node of the meeting state in the backward tree.
+    :type backwardNode: A Node.
+    :returns: The path from the start to the goal.
+    :rtype: A Path.
+    """
+    def splicePath(self,forwardNode,backwardNode):
+        result=self.constructPath(forwardNode)      #start to meeting state
+        result.cost+=backwardNode.getCost()         #backward costs are summed from the meeting state to the goal
+        while backwardNode.parent!=None:            #meeting state to goal
+            result.insert(len(result.list),ActionStatePair(backwardNode.action,backwardNode.parent.state))
+            backwardNode=backwardNode.parent
+        return result
+
+    """Test if a goal state is reached.
+    :param state: The state to check if it is a goal.
+    :type state: A State.
+    :returns: True if the state is the goal state.
+    :rtype: A True or False.
+    """
+    def isGoal(self,state):
+        return state==self.goalState
+
+"""Model a bidirectional uniform-cost search.
+One search tree grows forward from the start and another grows backward from the goal, each in order of path cost,
+always on the side with the smaller fringe. The search stops when the cheapest nodes of the two fringes together
+cost at least as much as the cheapest path found through a meeting state, so the path found is the cheapest.
+The states must override predecessor().
+"""
+class BidirectionalUniformCostSearchProblem(BidirectionalSearchProblem):
+    """To search for a solution in steps.
+    :returns: The solution of the search as a Path. Or None if no solution is found.
+    :rtype: A Path.
+    """
+    def searchSteps(self):
+        self.startBudget()
+        forwardRoot=Node(self.startState,None,None)
+        if self.startState==self.goalState:
+            return self.constructPath(forwardRoot)
+        backwardRoot=Node(self.goalState,None,None)
+        forward={self.startState:forwardRoot}   #cheapest forward node of each state
+        backward={self.goalState:backwardRoot}  #cheapest backward node of each state
+        counter=itertools.count()               #tie-breaker so that nodes are never compared
+        forwardFringe=[(0.0,next(counter),forwardRoot)]
+        backwardFringe=[(0.0,next(counter),backwardRoot)]
+        self.nodeVisited+=2
+        best=None       #cheapest (forward node, backward node) pair through a meeting state
+        bestCost=None
+
+        while forwardFringe and backwardFringe:
+            if best!=None and forwardFringe[0][0]+backwardFringe[0][0]>=bestCost:
+                break   #no cheaper path can be found
+            if self.overBudget(len(forward)+len(backward)):
+                return self.abort(entry[2] for entry in forwardFringe)
+            if self.nodeExpanded%self.stepSize==0:
+                yield
+            if len(forwardFringe)<=len(backwardFringe):     #grow the smaller side
+                meeting=self.expandNode(forwardFringe,forward,backward,True,counter)
+            else:
+                meeting=self.expandNode(backwardFringe,backward,forward,False,counter)
+            if meeting!=None and (best==None or forward[meeting].cost+backward[meeting].cost<bestCost):
+                best=(forward[meeting],backward[meeting])
+                bestCost=forward[meeting].cost+backward[meeting].cost
+        if best==None:
+            return None
+        return self.splicePath(best[0],best[1])
+
+    """Expand the cheapest node of one search tree.
+    :param fringe: The heap of (cost, tie-breaker, node) entries of the tree.
+    :type fringe: A list.
+    :param tree: The tree being grown.
+    :type tree: A dict of State to Node.
+    :param other: The tree growing from the other end.
+    :type other: A dict of State to Node.
+    :param isForward: True to follow successor(), False to follow predecessor().
+    :type isForward: A True or False.
+    :param counter: The tie-breaker counter.
+    :type counter: An itertools.count.
+    :returns: The meeting state with the cheapest path through it among the children, or None.
+    :rtype: A State.
+    """
+    def expandNode(self,fringe,tree,other,isForward,counter):
+        observer=self.observer
+        cost,_,node=heapq.heappop(fringe)
+        if tree[node.state] is not node:    #a cheaper node of this state was found after this entry was pushed
+            return None
+        meeting=None
+        meetingCost=None
+        expand=node.state.successor if isForward else lambda:self.predecessors(node.state)
+        if observer!=None:
+            observer.expanded(len(fringe))
+            pairs=observer.timed("successor",expand)
+            observer.generated(len(pairs))
+        else:
+            pairs=expand()
+        for actionState in pairs:
+            state=actionState.state
+            self.nodeVisited+=1
+            lastNode=tree.get(state)
+            if lastNode!=None and lastNode.cost<=cost+actionState.action.cost:
+                if observer!=None:
+                    observer.duplicated(1)
+                continue    #not cheaper
+            if lastNode!=None and observer!=None:
+                observer.reopened(1)
+            childNode=Node(state,node,actionState.action)
+            tree[state]=childNode
+            heapq.heappush(fringe,(childNode.cost,next(counter),childNode))
+            otherNode=other.get(state)
+            if otherNode!=None and (meeting==None or childNode.cost+otherNode.cost<meetingCost):
+                meeting=state
+                meetingCost=childNode.cost+otherNode.cost
+        return meeting